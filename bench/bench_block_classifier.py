@@ -0,0 +1,40 @@
+import random
+import sys
+import timeit
+
+from bench.corpus import paragraph_heavy_page
+from src.markdown_blocks import block_to_block_type, lines_to_block_type, markdown_to_blocks, BlockType
+
+def scanned_block_type(markdown_block):
+    # the classifier before the single pass: one all() scan per block type
+    lines = markdown_block.split("\n")
+    if len(lines) >= 2 and lines[0] == "```" and lines[-1] == "```":
+        return BlockType.CODE
+    if all(line.startswith(">") for line in lines):
+        return BlockType.QUOTE
+    if all(line.startswith("- ") for line in lines):
+        return BlockType.UNORDERED_LIST
+    if all(line.startswith(f"{i+1}. ") for i, line in enumerate(lines)):
+        return BlockType.ORDERED_LIST
+    return lines_to_block_type(lines[:1])
+
+def time_min(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    print(f"{'blocks':>7} {'paragraphs':>11} {'scans us/blk':>13} {'single us/blk':>14} {'speedup':>8}")
+    for size in sizes:
+        blocks = markdown_to_blocks(paragraph_heavy_page(random.Random(0), size))
+        types = [block_to_block_type(block) for block in blocks]
+        assert types == [scanned_block_type(block) for block in blocks]
+        paragraphs = types.count(BlockType.PARAGRAPH)
+        number = max(1, 20000 // len(blocks))
+
+        old = time_min(lambda: [scanned_block_type(block) for block in blocks], number)
+        new = time_min(lambda: [block_to_block_type(block) for block in blocks], number)
+        print(f"{len(blocks):>7} {paragraphs:>11} {old / len(blocks) * 1e6:>13.3f} {new / len(blocks) * 1e6:>14.3f}"
+              f" {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
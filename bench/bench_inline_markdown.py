@@ -0,0 +1,137 @@
+import random
+import re
+import sys
+import timeit
+
+from src.inline_markdown import text_to_textnodes
+from src.textnode import TextNode, TextType
+
+# The five-pass pipeline text_to_textnodes used before the single-pass
+# scanner, copied from that revision: the splitters in src.inline_markdown
+# have been rewritten since, so chaining them would not measure the old code.
+
+def multi_pass_text_to_textnodes(text):
+    if not text:
+        return []
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = _split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = _split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = _split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = _split_nodes_image(nodes)
+    return _split_nodes_link(nodes)
+
+def _split_nodes_delimiter(old_nodes, delimiter, text_type):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        text = node.text
+        cursor = 0
+        while text.find(delimiter, cursor) != -1:
+            opening = text.find(delimiter, cursor)
+            if opening > cursor:
+                new_nodes.append(TextNode(text[cursor:opening], TextType.TEXT))
+            closing = text.find(delimiter, opening + len(delimiter))
+            if closing == -1:
+                raise Exception(f"missing closing delimiter: {delimiter}")
+            new_nodes.append(TextNode(text[opening + len(delimiter): closing], text_type))
+            cursor = closing + len(delimiter)
+        if cursor < len(node.text):
+            new_nodes.append(TextNode(text[cursor:], TextType.TEXT))
+    return new_nodes
+
+def _split_nodes_image(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        text = node.text
+        for alt, url in re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text):
+            before, after = text.split(f"![{alt}]({url})", 1)
+            if before:
+                new_nodes.append(TextNode(before, TextType.TEXT))
+            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
+            text = after
+        if text:
+            new_nodes.append(TextNode(text, TextType.TEXT))
+    return new_nodes
+
+def _split_nodes_link(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        text = node.text
+        for alt, url in re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text):
+            before, after = text.split(f"[{alt}]({url})", 1)
+            if before:
+                new_nodes.append(TextNode(before, TextType.TEXT))
+            new_nodes.append(TextNode(alt, TextType.LINK, url))
+            text = after
+        if text:
+            new_nodes.append(TextNode(text, TextType.TEXT))
+    return new_nodes
+
+def links_only_paragraph(spans, seed=0):
+    return " ".join(f"read [part {i}](/docs/part-{i}) or" for i in range(spans))
+
+def mixed_paragraph(spans, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    for i in range(spans):
+        kind = rng.random()
+        if kind < 0.5:
+            parts.append(f"see [page {i}](/blog/post-{i})")
+        elif kind < 0.6:
+            parts.append(f"![figure {i}](/images/fig-{i}.png)")
+        elif kind < 0.7:
+            parts.append(f"**bold {i}**")
+        elif kind < 0.8:
+            parts.append(f"_italic {i}_")
+        elif kind < 0.9:
+            parts.append(f"`code {i}`")
+        else:
+            parts.append("plain words in between")
+    return " and ".join(parts)
+
+def code_paragraph(spans, seed=0):
+    # code and italic spans without any bold, so every token looks ahead for
+    # a ** that never comes
+    rng = random.Random(seed)
+    parts = []
+    for i in range(spans):
+        kind = rng.random()
+        if kind < 0.6:
+            parts.append(f"`fn{i}()`")
+        elif kind < 0.8:
+            parts.append(f"_note {i}_")
+        else:
+            parts.append("then call")
+    return " ".join(parts)
+
+def best_of(old_func, new_func, number, repeat=9):
+    # alternates the two so that load on the machine hits both alike, and
+    # keeps the fastest of each
+    old = new = float("inf")
+    for _ in range(repeat):
+        old = min(old, timeit.timeit(old_func, number=number) / number)
+        new = min(new, timeit.timeit(new_func, number=number) / number)
+    return old, new
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    print(f"{'corpus':>8} {'spans':>6} {'chars':>8} {'multi-pass ms':>14} {'single-pass ms':>15} {'speedup':>8}")
+    for name, make_paragraph in [("links", links_only_paragraph), ("mixed", mixed_paragraph),
+                                 ("code", code_paragraph)]:
+        for spans in sizes:
+            text = make_paragraph(spans)
+            assert text_to_textnodes(text) == multi_pass_text_to_textnodes(text)
+            old, new = best_of(lambda: multi_pass_text_to_textnodes(text), lambda: text_to_textnodes(text),
+                               number=max(1, 20000 // spans))
+            print(f"{name:>8} {spans:>6} {len(text):>8} {old * 1000:>14.3f} {new * 1000:>15.3f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
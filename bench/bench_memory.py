@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench.corpus import write_corpus
+
+# Runs inside a child interpreter with the tree under test first on sys.path.
+# All page trees are kept alive so node size dominates the measurement.
+CHILD = r"""
+import json, os, resource, sys, tracemalloc
+from src.markdown_html import markdown_to_html_node
+from src.inline_markdown import text_to_textnodes
+
+corpus = sys.argv[1]
+texts = []
+for root, _, files in sorted(os.walk(corpus)):
+    for name in sorted(files):
+        with open(os.path.join(root, name), encoding="utf-8") as file:
+            texts.append(file.read())
+
+tracemalloc.start()
+blocks_before = sys.getallocatedblocks()
+trees = [markdown_to_html_node(text) for text in texts]
+spans = []
+for text in texts:
+    for line in text.split("\n"):
+        try:
+            spans.append(text_to_textnodes(line))
+        except Exception:
+            pass
+current, peak = tracemalloc.get_traced_memory()
+blocks = sys.getallocatedblocks() - blocks_before
+tracemalloc.stop()
+print(json.dumps({
+    "pages": len(trees),
+    "traced_current_mb": current / 2**20,
+    "traced_peak_mb": peak / 2**20,
+    "allocated_blocks": blocks,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+def measure(tree, corpus):
+    env = dict(os.environ, PYTHONPATH=tree)
+    out = subprocess.run([sys.executable, "-c", CHILD, corpus], cwd=tree, env=env,
+                         check=True, capture_output=True, text=True)
+    return json.loads(out.stdout)
+
+def export_tree(rev, dest):
+    archive = subprocess.run(["git", "archive", rev, "src"], check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", dest], input=archive, check=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare node memory against an earlier revision")
+    # no default: HEAD~1 only meant "before __slots__" while that was the
+    # latest commit
+    parser.add_argument("--baseline", required=True,
+                        help="git revision to compare against; for the __slots__ change, its parent: "
+                             "git log -1 --format=%%h~1 -S__slots__ -- src/textnode.py")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "content")
+        write_corpus(corpus, args.pages, args.blocks)
+        baseline_tree = os.path.join(tmp, "baseline")
+        os.makedirs(baseline_tree)
+        export_tree(args.baseline, baseline_tree)
+        results = {
+            args.baseline: measure(baseline_tree, corpus),
+            "working tree": measure(os.getcwd(), corpus),
+        }
+
+    keys = ["traced_current_mb", "traced_peak_mb", "allocated_blocks", "max_rss_mb"]
+    print(f"{'':>14}" + "".join(f"{key:>20}" for key in keys))
+    for name, result in results.items():
+        print(f"{name:>14}" + "".join(f"{result[key]:>20,.1f}" for key in keys))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+from bench.corpus import SHAPES, write_shape
+from src.generate_page import generate_page_recursive
+from src.inline_markdown import text_to_textnodes
+from src.markdown_blocks import block_to_block_type, markdown_to_blocks, BlockType
+from src.markdown_html import markdown_to_html_node
+
+TEMPLATE = "<!doctype html><title>{{ Title }}</title><link href=\"/index.css\" /><article>{{ Content }}</article>"
+
+def best_of(repeat, func, setup=None):
+    # setup runs before every timed call and is not part of its time
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def read_corpus(content_dir):
+    texts = []
+    for root, dirs, files in os.walk(content_dir):
+        dirs.sort()
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'r', encoding="utf-8") as file:
+                texts.append(file.read())
+    return texts
+
+def inline_texts(blocks):
+    texts = []
+    for block in blocks:
+        if block_to_block_type(block) == BlockType.PARAGRAPH:
+            texts.append(block.replace("\n", " "))
+    return texts
+
+def bench_shape(shape, scale, repeat, workdir):
+    content_dir = os.path.join(workdir, shape, "content")
+    write_shape(content_dir, shape, scale)
+    template_path = os.path.join(workdir, shape, "template.html")
+    with open(template_path, 'w', encoding="utf-8") as file:
+        file.write(TEMPLATE)
+    texts = read_corpus(content_dir)
+    blocks = [block for text in texts for block in markdown_to_blocks(text)]
+    paragraphs = inline_texts(blocks)
+    trees = [markdown_to_html_node(text) for text in texts]
+
+    dest = os.path.join(workdir, shape, "docs")
+
+    def clear_output():
+        shutil.rmtree(dest, ignore_errors=True)
+        os.makedirs(dest)
+
+    def build():
+        with redirect_stdout(StringIO()):
+            generate_page_recursive(content_dir, template_path, dest, "/")
+
+    stages = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(text) for text in texts],
+        "block_to_block_type": lambda: [block_to_block_type(block) for block in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(text) for text in paragraphs],
+        "markdown_to_html_node": lambda: [markdown_to_html_node(text) for text in texts],
+        "to_html": lambda: [tree.to_html() for tree in trees],
+        "generate_page_recursive": build,
+    }
+    # every build starts from an empty output directory
+    setups = {"generate_page_recursive": clear_output}
+    return {
+        "pages": len(texts),
+        "bytes": sum(len(text.encode("utf-8")) for text in texts),
+        "blocks": len(blocks),
+        "seconds": {name: best_of(repeat, func, setups.get(name)) for name, func in stages.items()},
+    }
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+def print_results(results, baseline=None):
+    print(f"{'shape':<16}{'stage':<26}{'ms':>10}{'vs baseline':>14}")
+    for shape, result in results["shapes"].items():
+        for stage, seconds in result["seconds"].items():
+            line = f"{shape:<16}{stage:<26}{seconds * 1000:>10.2f}"
+            try:
+                before = baseline["shapes"][shape]["seconds"][stage]
+                line += f"{(seconds - before) / before:>+13.1%}"
+            except (TypeError, KeyError, ZeroDivisionError):
+                pass
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each stage of the markdown-to-HTML pipeline")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the page count of every corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of N runs")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "shapes": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for shape in args.shapes:
+            results["shapes"][shape] = bench_shape(shape, args.scale, args.repeat, workdir)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"wrote {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
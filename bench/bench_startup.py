@@ -0,0 +1,101 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import time budget per command in ms on top of a bare interpreter, so that
+# a new eager import shows up as a failure here; each is about 1.4x the
+# slowest of eight runs on the reference machine, which left help with
+# too little room at 30
+BUDGETS_MS = {
+    "help": 35,
+    "render-one": 40,
+    "build": 80,
+    "serve": 90,
+    "watch": 120,
+}
+
+BARE = "bare"
+
+def scenarios(site_dir):
+    page = os.path.join(site_dir, "content", "index.md")
+    return {
+        "help": ["-m", "src.main", "--help"],
+        "render-one": ["-m", "src.main", "render-one", page],
+        "build": ["-m", "src.main", "build"],
+        # these two block forever, so only their imports are measured
+        "serve": ["-c", "import src.main, src.serve"],
+        "watch": ["-c", "import src.main, src.watch"],
+    }
+
+def import_ms(stderr):
+    # sum of the cumulative times of top-level imports, in ms
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total / 1000
+
+def run(args, cwd):
+    env = dict(os.environ, PYTHONPATH=REPO, PYTHONDONTWRITEBYTECODE="")
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=cwd, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return import_ms(out.stderr), (time.perf_counter() - started) * 1000
+
+def measure(scenarios, cwd, repeat):
+    # the commands take turns, so a slow stretch on the machine slows one
+    # run of each instead of every run of one; the fastest run is kept
+    runs = {name: [] for name in scenarios}
+    for _ in range(repeat):
+        for name, args in scenarios.items():
+            runs[name].append(run(args, cwd))
+    return {name: (min(ms for ms, _ in times), min(wall for _, wall in times))
+            for name, times in runs.items()}
+
+def make_site(dir_path):
+    for name in ["content", "static"]:
+        shutil.copytree(os.path.join(REPO, name), os.path.join(dir_path, name))
+    shutil.copy(os.path.join(REPO, "template.html"), dir_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI startup with -X importtime against a budget")
+    parser.add_argument("--repeat", type=int, default=9, help="runs per command, the fastest is kept (default: 9)")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every budget, for machines slower than the reference (default: 1.0)")
+    parser.add_argument("commands", nargs="*", metavar="command",
+                        help=f"commands to measure, out of {', '.join(BUDGETS_MS)} (default: all)")
+    args = parser.parse_args()
+    unknown = set(args.commands) - set(BUDGETS_MS)
+    if unknown:
+        parser.error(f"unknown commands: {', '.join(sorted(unknown))}")
+
+    over = []
+    with tempfile.TemporaryDirectory() as site_dir:
+        make_site(site_dir)
+        commands = {command: command_args for command, command_args in scenarios(site_dir).items()
+                    if not args.commands or command in args.commands}
+        results = measure({BARE: ["-c", "pass"], **commands}, site_dir, args.repeat)
+        baseline_ms, baseline_wall = results.pop(BARE)
+        print(f"bare interpreter: {baseline_ms:.1f} ms imports, {baseline_wall:.1f} ms wall")
+        print(f"{'command':<12}{'imports ms':>12}{'budget ms':>11}{'wall ms':>10}")
+        for command, (ms, wall) in results.items():
+            ms -= baseline_ms
+            budget = BUDGETS_MS[command] * args.budget_scale
+            status = "" if ms <= budget else "  OVER BUDGET"
+            if status:
+                over.append(command)
+            print(f"{command:<12}{ms:>12.1f}{budget:>11.0f}{wall:>10.1f}{status}")
+    if over:
+        sys.exit(f"over the startup budget: {', '.join(over)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import os
+import random
+
+WORDS = ("the quick brown fox jumps over lazy dog elf ring river mountain "
+         "shadow light road tree song stone").split()
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def inline_paragraph(rng, spans):
+    parts = []
+    for i in range(spans):
+        kind = rng.random()
+        if kind < 0.3:
+            parts.append(f"[{rng.choice(WORDS)}](/blog/{rng.choice(WORDS)}-{i})")
+        elif kind < 0.4:
+            parts.append(f"**{sentence(rng, 2)}**")
+        elif kind < 0.5:
+            parts.append(f"_{sentence(rng, 2)}_")
+        elif kind < 0.6:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        else:
+            parts.append(sentence(rng, 6))
+    return " ".join(parts)
+
+def synthetic_page(rng, blocks):
+    lines = [f"# {sentence(rng, 4).title()}", ""]
+    for i in range(blocks):
+        kind = i % 6
+        if kind == 0:
+            lines.append(f"## {sentence(rng, 3)}")
+        elif kind == 1:
+            lines.append(f"- {inline_paragraph(rng, 2)}\n- {inline_paragraph(rng, 2)}\n- {sentence(rng)}")
+        elif kind == 2:
+            lines.append(f"1. {sentence(rng)}\n2. {inline_paragraph(rng, 3)}")
+        elif kind == 3:
+            lines.append(f"> {inline_paragraph(rng, 3)}\n> {sentence(rng)}")
+        elif kind == 4:
+            lines.append(f"```\ndef f():\n    return {rng.randint(0, 99)}\n```")
+        else:
+            lines.append(inline_paragraph(rng, 8))
+        lines.append("")
+    return "\n".join(lines)
+
+def link_heavy_page(rng, blocks):
+    lines = [f"# {sentence(rng, 4).title()}", ""]
+    for _ in range(blocks):
+        lines.append(" ".join(f"[{rng.choice(WORDS)}](/blog/{rng.choice(WORDS)}) and "
+                              f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)" for _ in range(20)))
+        lines.append("")
+    return "\n".join(lines)
+
+def nested_list_page(rng, blocks, depth=6):
+    # the renderer has no nested lists, so indented items parse as the
+    # paragraphs and flat lists a real page with nesting would produce
+    lines = [f"# {sentence(rng, 4).title()}", ""]
+    for _ in range(blocks):
+        for level in range(depth):
+            lines.append("  " * level + f"- {inline_paragraph(rng, 2)}")
+        lines.append("")
+        lines.extend(f"- {sentence(rng, 4)}" for _ in range(depth * 4))
+        lines.append("")
+    return "\n".join(lines)
+
+def paragraph_heavy_page(rng, blocks):
+    # mostly multi-line prose paragraphs with the odd heading and list, like
+    # a typical blog post
+    lines = [f"# {sentence(rng, 4).title()}", ""]
+    for i in range(blocks):
+        if i % 10 == 0:
+            lines.append(f"## {sentence(rng, 3)}")
+        elif i % 10 == 5:
+            lines.append(f"- {sentence(rng)}\n- {sentence(rng)}")
+        else:
+            lines.extend(inline_paragraph(rng, 3) for _ in range(rng.randint(1, 4)))
+        lines.append("")
+    return "\n".join(lines)
+
+# name -> (page generator, pages, blocks per page) at scale 1
+SHAPES = {
+    "many_small": (synthetic_page, 400, 8),
+    "huge_pages": (synthetic_page, 3, 3000),
+    "link_heavy": (link_heavy_page, 40, 50),
+    "nested_lists": (nested_list_page, 40, 40),
+    "paragraph_heavy": (paragraph_heavy_page, 40, 100),
+}
+
+def write_corpus(dir_path, pages, blocks, seed=0, make_page=synthetic_page):
+    rng = random.Random(seed)
+    for i in range(pages):
+        page_dir = os.path.join(dir_path, f"post-{i:05d}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), 'w', encoding="utf-8") as file:
+            file.write(make_page(rng, blocks))
+
+def write_shape(dir_path, shape, scale=1.0, seed=0):
+    make_page, pages, blocks = SHAPES[shape]
+    write_corpus(dir_path, max(1, round(pages * scale)), blocks, seed, make_page)
@@ -1,2 +1,2 @@
 python3 -m src.main
-cd docs && python3 -m http.server 8888
\ No newline at end of file
+python3 -m src.main serve --port 8888
\ No newline at end of file
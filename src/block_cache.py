@@ -0,0 +1,117 @@
+import os
+
+from src.stats import Counters, register
+
+# bump when block rendering changes, so entries from older builds miss
+CACHE_VERSION = 2
+
+class BlockCache(Counters):
+    """On-disk cache of rendered markdown blocks, one store per page.
+
+    A page's store maps the hash of each block's type and text to its HTML.
+    It is read once when the page starts rendering and, if anything
+    changed, rewritten once when it ends with only the blocks the page
+    still has, so an edited page renders just its changed blocks and
+    leaves nothing behind. A page is rendered by one process at a time,
+    so worker processes never write the same store.
+    """
+
+    COUNTERS = ("hits", "misses")
+
+    def __init__(self):
+        self.enabled = False
+        self.dir_path = None
+        self.hits = 0
+        self.misses = 0
+        self.store_path = None
+        self.entries = {}
+        self.used = {}
+
+    def enable(self, dir_path):
+        self.enabled = dir_path is not None
+        self.dir_path = dir_path
+
+    def key_for(self, block, block_type):
+        # imported here so that commands which never enable the cache do not
+        # load hashlib at startup
+        import hashlib
+        return hashlib.sha256(f"{block_type.value}\0{block}".encode("utf-8")).hexdigest()
+
+    def store_for(self, dest_path):
+        import hashlib
+        return os.path.join(self.dir_path, hashlib.sha256(dest_path.encode("utf-8")).hexdigest() + ".json")
+
+    def begin_page(self, dest_path):
+        # blocks looked up outside a page, or in a page without a
+        # dest_path, are only kept in memory until the next page
+        if not self.enabled:
+            return
+        self.store_path = None if dest_path is None else self.store_for(dest_path)
+        self.entries = {}
+        self.used = {}
+        if self.store_path is None:
+            return
+        import json
+        try:
+            with open(self.store_path, 'r', encoding="utf-8") as file:
+                store = json.load(file)
+        except FileNotFoundError:
+            return
+        if store.get("version") == CACHE_VERSION:
+            self.entries = store["blocks"]
+
+    def end_page(self):
+        # entries the page no longer has are dropped with the rewrite
+        if not self.enabled or self.store_path is None:
+            return
+        if self.used.keys() != self.entries.keys():
+            import json
+            os.makedirs(self.dir_path, exist_ok=True)
+            tmp_path = f"{self.store_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding="utf-8") as file:
+                json.dump({"version": CACHE_VERSION, "blocks": self.used}, file, separators=(",", ":"))
+            os.replace(tmp_path, self.store_path)
+        self.store_path = None
+        self.entries = {}
+        self.used = {}
+
+    def get(self, block, block_type):
+        key = self.key_for(block, block_type)
+        html = self.used.get(key)
+        if html is None:
+            html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.used[key] = html
+        self.hits += 1
+        return html
+
+    def put(self, block, block_type, html):
+        self.used[self.key_for(block, block_type)] = html
+
+    def prune(self, dest_paths):
+        # drops the stores of pages that no longer exist, and anything else
+        # in the cache directory, such as entries of an older layout
+        if not os.path.isdir(self.dir_path):
+            return 0
+        live = {os.path.basename(self.store_for(dest_path)) for dest_path in dest_paths}
+        removed = 0
+        for name in os.listdir(self.dir_path):
+            if name in live:
+                continue
+            path = os.path.join(self.dir_path, name)
+            if os.path.isdir(path):
+                import shutil
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            removed += 1
+        return removed
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"Block cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate)"
+
+block_cache = register("block_cache", BlockCache())
@@ -0,0 +1,170 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.fileutil import load_json, save_json
+
+COMPRESS_VERSION = 1
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".md")
+# below this, the saving is smaller than a network packet and not worth a file
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+def available_formats():
+    # gzip is always there; brotli only if the optional module is installed
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return ["gz"]
+    return ["gz", "br"]
+
+def compress_data(data, fmt):
+    if fmt == "gz":
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    import brotli
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+def find_compressible(dir_path, min_size):
+    # (path, size) of every text asset under dir_path of at least min_size
+    # bytes; returns the too-small count separately
+    found = []
+    small = 0
+    for parent, dir_names, file_names in os.walk(dir_path):
+        dir_names.sort()
+        for name in sorted(file_names):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(parent, name)
+            if os.path.getsize(path) < min_size:
+                small += 1
+            else:
+                found.append(path)
+    return found, small
+
+class SiblingCompressor:
+    """Writes .gz (and .br) siblings next to the text files of a site.
+
+    The manifest maps each compressed file to the hash of its content at the
+    last build, so files whose content did not change keep their siblings.
+    Compressed bytes are also kept in cache_dir by content hash, which lets a
+    full build (that starts from an empty output directory) restore siblings
+    without compressing again.
+    """
+
+    def __init__(self, manifest_path, cache_dir, formats=None):
+        self.manifest_path = manifest_path
+        self.cache_dir = cache_dir
+        self.formats = available_formats() if formats is None else formats
+        # one lock per (content hash, format), so files with the same content
+        # compress it once, and only one thread writes its blob
+        self.blob_locks = {}
+        self.blob_locks_lock = threading.Lock()
+
+    def blob_path(self, content_hash, fmt):
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash[2:]}.{fmt}")
+
+    def compress_file(self, path, old_hash):
+        # returns (content hash, what was done)
+        with open(path, 'rb') as file:
+            data = file.read()
+        content_hash = hashlib.sha256(data).hexdigest()
+        siblings = [f"{path}.{fmt}" for fmt in self.formats]
+        if content_hash == old_hash and all(os.path.exists(sibling) for sibling in siblings):
+            return content_hash, "unchanged"
+        action = "reused"
+        source_stat = os.stat(path)
+        for fmt, sibling in zip(self.formats, siblings):
+            compressed, fresh = self.load_blob(content_hash, fmt, data)
+            if fresh:
+                action = "compressed"
+            _write_atomic(sibling, compressed)
+            # servers that negotiate precompressed files compare timestamps
+            os.utime(sibling, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        return content_hash, action
+
+    def load_blob(self, content_hash, fmt, data):
+        # returns (compressed bytes, whether they were compressed just now)
+        with self.blob_locks_lock:
+            lock = self.blob_locks.setdefault((content_hash, fmt), threading.Lock())
+        blob_path = self.blob_path(content_hash, fmt)
+        with lock:
+            try:
+                with open(blob_path, 'rb') as file:
+                    return file.read(), False
+            except FileNotFoundError:
+                compressed = compress_data(data, fmt)
+                _write_atomic(blob_path, compressed)
+                return compressed, True
+
+    def run(self, public_dir, min_size=DEFAULT_MIN_SIZE, jobs=None):
+        started = time.perf_counter()
+        manifest = load_json(self.manifest_path, {})
+        if manifest.get("version") != COMPRESS_VERSION or manifest.get("formats") != self.formats:
+            manifest = {}
+        old_files = manifest.get("files", {})
+        paths, small = find_compressible(public_dir, min_size)
+        counts = {"compressed": 0, "reused": 0, "unchanged": 0, "too small": small, "removed": 0}
+
+        # zlib and brotli release the GIL while compressing, so threads run
+        # the compression in parallel without pickling file contents
+        jobs = jobs or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(lambda path: self.compress_file(path, old_files.get(path)), paths)
+            files = {}
+            for path, (content_hash, action) in zip(paths, results):
+                files[path] = content_hash
+                counts[action] += 1
+
+        for path in sorted(set(old_files) - set(files)):
+            # the file is gone or now below the threshold
+            for fmt in self.formats:
+                sibling = f"{path}.{fmt}"
+                if os.path.exists(sibling):
+                    os.remove(sibling)
+                    counts["removed"] += 1
+        self.blob_locks = {}
+        self.prune(set(files.values()))
+        save_json(self.manifest_path, {"version": COMPRESS_VERSION, "formats": self.formats, "files": files})
+        elapsed = time.perf_counter() - started
+        print(f"Compressed siblings ({', '.join(self.formats)}) in {elapsed:.2f}s: "
+              + ", ".join(f"{count} {name}" for name, count in counts.items()))
+        return counts
+
+    def prune(self, live_hashes):
+        # drops cached blobs of content that no current file has
+        if not os.path.isdir(self.cache_dir):
+            return
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            for name in os.listdir(prefix_dir):
+                if prefix + name.split(".")[0] not in live_hashes:
+                    os.remove(os.path.join(prefix_dir, name))
+            if not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+
+def remove_siblings(manifest_path):
+    # Deletes the siblings the last run wrote, and its manifest. Pages or
+    # assets written by a build that does not compress would otherwise be
+    # served as their old compressed copy.
+    manifest = load_json(manifest_path, {})
+    removed = 0
+    for path in manifest.get("files", {}):
+        for fmt in manifest.get("formats", []):
+            if os.path.exists(f"{path}.{fmt}"):
+                os.remove(f"{path}.{fmt}")
+                removed += 1
+    os.remove(manifest_path)
+    return removed
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # compression runs on threads, so the pid alone is not unique
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
@@ -1,15 +1,180 @@
+import errno
 import os, shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
+from src.fileutil import hash_file, load_json, remove_output, save_json
+
+DEFAULT_COPY_JOBS = 16
+
+def copy_files_recursive(source_dir_path, dest_dir_path, jobs=DEFAULT_COPY_JOBS, manifest_path=None):
+    # with manifest_path, records the copied assets the way a sync does, so
+    # a later sync can remove the ones whose source is gone
     if not os.path.exists(dest_dir_path):
         os.mkdir(dest_dir_path)
+    files = find_static_files(source_dir_path, dest_dir_path)
+    counts = place_files(files, jobs=jobs)
+    if manifest_path is not None:
+        save_json(manifest_path, sorted(dest_path for _, dest_path in files))
+    return counts
+
+def copy_file_data(from_path, dest_path):
+    # Prefers in-kernel copies: copy_file_range (which can also share extents
+    # or copy server-side), then sendfile, then a plain read/write loop.
+    with open(from_path, 'rb') as source, open(dest_path, 'wb') as dest:
+        source_fd, dest_fd = source.fileno(), dest.fileno()
+        size = os.fstat(source_fd).st_size
+        for copy in (_copy_file_range, _sendfile):
+            try:
+                copy(source_fd, dest_fd, size)
+                return
+            except (AttributeError, OSError) as e:
+                if isinstance(e, OSError) and e.errno not in _FALLBACK_ERRNOS:
+                    raise
+                os.lseek(source_fd, 0, os.SEEK_SET)
+                os.lseek(dest_fd, 0, os.SEEK_SET)
+                os.ftruncate(dest_fd, 0)
+        shutil.copyfileobj(source, dest)
+
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+def _copy_file_range(source_fd, dest_fd, size):
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(source_fd, dest_fd, size - copied)
+        if count == 0:
+            break
+        copied += count
+
+def _sendfile(source_fd, dest_fd, size):
+    copied = 0
+    while copied < size:
+        count = os.sendfile(dest_fd, source_fd, copied, size - copied)
+        if count == 0:
+            break
+        copied += count
+
+def place_files(file_pairs, link_mode="copy", jobs=DEFAULT_COPY_JOBS):
+    # places (from_path, dest_path) pairs on a bounded thread pool, which
+    # hides per-file latency on slow or network storage; the copies release
+    # the GIL while the kernel moves the bytes
+    counts = {"copy": 0, "hardlink": 0, "reflink": 0}
+    if not file_pairs:
+        return counts
+    started = time.perf_counter()
+    for dest_dir in sorted({os.path.dirname(dest_path) for _, dest_path in file_pairs}):
+        os.makedirs(dest_dir, exist_ok=True)
+
+    def place(pair):
+        return place_file(pair[0], pair[1], link_mode), os.path.getsize(pair[1])
+
+    if jobs <= 1 or len(file_pairs) == 1:
+        results = map(place, file_pairs)
+        total_bytes = _tally(results, counts)
+    else:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(file_pairs))) as executor:
+            total_bytes = _tally(executor.map(place, file_pairs), counts)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"Placed {len(file_pairs)} files ({total_bytes / 2**20:.1f} MB) in {elapsed:.2f}s: "
+          f"{len(file_pairs) / elapsed:.0f} files/s, {total_bytes / 2**20 / elapsed:.1f} MB/s")
+    return counts
+
+def _tally(results, counts):
+    total_bytes = 0
+    for method, size in results:
+        counts[method] += 1
+        total_bytes += size
+    return total_bytes
+
+FICLONE = 0x40049409  # linux/fs.h, copy-on-write clone of a whole file
+
+def _reflink(from_path, tmp_path):
+    import fcntl
+    with open(from_path, 'rb') as source, open(tmp_path, 'wb') as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+
+def place_file(from_path, dest_path, link_mode="copy"):
+    # never write into an existing dest: it may be a hardlink to the source
+    if link_mode == "hardlink":
+        try:
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+            os.link(from_path, dest_path)
+            return "hardlink"
+        except OSError:
+            pass
+    tmp_path = dest_path + ".tmp"
+    method = "copy"
+    try:
+        if link_mode == "reflink":
+            try:
+                _reflink(from_path, tmp_path)
+                method = "reflink"
+            except (ImportError, OSError):
+                pass
+        if method == "copy":
+            copy_file_data(from_path, tmp_path)
+        shutil.copystat(from_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return method
+
+def is_up_to_date(from_path, dest_path, use_hash=False):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    from_stat = os.stat(from_path)
+    if os.path.samestat(from_stat, dest_stat):
+        return True
+    if from_stat.st_size != dest_stat.st_size:
+        return False
+    if from_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(from_path) == hash_file(dest_path):
+        # same bytes, only the mtime moved: adopt it so the next check is cheap
+        shutil.copystat(from_path, dest_path)
+        return True
+    return False
+
+def find_static_files(source_dir_path, dest_dir_path):
+    files = []
+    with os.scandir(source_dir_path) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            dest_path = os.path.join(dest_dir_path, entry.name)
+            if entry.is_dir():
+                files.extend(find_static_files(entry.path, dest_path))
+            else:
+                files.append((entry.path, dest_path))
+    return files
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
-    
+def sync_files_recursive(source_dir_path, dest_dir_path, manifest_path, use_hash=False, link_mode="copy",
+                         jobs=DEFAULT_COPY_JOBS):
+    # Copies only new or changed assets into dest_dir_path and removes the
+    # ones whose source is gone. The manifest lists the assets placed by the
+    # last sync, so generated pages in the same directory are never touched.
+    old_files = load_json(manifest_path, [])
+    files = find_static_files(source_dir_path, dest_dir_path)
+    current = {dest_path for _, dest_path in files}
+    # removed first: removing an asset takes its .gz/.br siblings along, and
+    # a sibling that is itself a static asset must then be placed again
+    removed = 0
+    for dest_path in old_files:
+        if dest_path not in current and os.path.exists(dest_path):
+            print(f" * removing {dest_path}")
+            remove_output(dest_path, dest_dir_path)
+            removed += 1
+    changed = []
+    for from_path, dest_path in files:
+        if not is_up_to_date(from_path, dest_path, use_hash):
+            print(f" * {from_path} -> {dest_path}")
+            changed.append((from_path, dest_path))
+    counts = {"unchanged": len(files) - len(changed)}
+    counts.update(place_files(changed, link_mode, jobs))
+    counts["removed"] = removed
+    save_json(manifest_path, sorted(current))
+    print(", ".join(f"{count} {name}" for name, count in counts.items() if count or name == "unchanged"))
+    return counts
@@ -0,0 +1,115 @@
+import os
+import re
+from urllib.parse import unquote, urlsplit
+
+from src.fileutil import hash_file, load_json, save_json
+
+GRAPH_VERSION = 2
+
+# root-relative URLs that the basepath rewrite touches: src="/..." and
+# href="/..." in the template, and /... image and link targets in markdown
+TEMPLATE_REF_RE = re.compile(r'(?:src|href)="(/[^"]*)"')
+MARKDOWN_REF_RE = re.compile(r"\]\((/[^\(\)]*)\)")
+
+def source_node(path):
+    return f"source:{path}"
+
+def template_node(path):
+    return f"template:{path}"
+
+def asset_node(path):
+    return f"asset:{path}"
+
+BASEPATH_NODE = "basepath"
+# present only in graphs of minified builds, so turning minification on or
+# off rebuilds every page while plain builds are unaffected
+MINIFY_NODE = "minify"
+
+def referenced_assets(urls, static_dir):
+    # only URLs that resolve to a file in static_dir are asset dependencies;
+    # links to other pages are not
+    assets = set()
+    for url in urls:
+        rel_path = unquote(urlsplit(url).path).lstrip("/")
+        if not rel_path:
+            continue
+        path = os.path.join(static_dir, rel_path)
+        if os.path.isfile(path):
+            assets.add(path)
+    return assets
+
+class DependencyGraph:
+    """Persisted page -> input graph used by incremental builds.
+
+    nodes maps every input (sources, the template, the basepath, referenced
+    static assets, minification) to a signature; pages maps each output to the inputs it
+    was built from. An output is stale when any of its inputs' signatures
+    differ from the ones recorded at its last build.
+    """
+
+    def __init__(self, nodes=None, pages=None):
+        self.nodes = nodes or {}
+        self.pages = pages or {}
+
+    @classmethod
+    def load(cls, path):
+        data = load_json(path, {})
+        if data.get("version") != GRAPH_VERSION:
+            return cls()
+        return cls(data["nodes"], data["pages"])
+
+    def save(self, path):
+        save_json(path, {"version": GRAPH_VERSION, "nodes": self.nodes, "pages": self.pages})
+
+    def add_page(self, dest_path, from_path, deps):
+        self.pages[dest_path] = {"source": from_path, "deps": list(deps)}
+
+    def stale_reasons(self, dest_path, current):
+        """Why dest_path must be rebuilt given the current graph, [] if not."""
+        old_page = self.pages.get(dest_path)
+        if old_page is None:
+            return ["new page"]
+        new_page = current.pages[dest_path]
+        reasons = []
+        if not os.path.exists(dest_path):
+            reasons.append("output missing")
+        for node in new_page["deps"]:
+            if node not in old_page["deps"]:
+                reasons.append(f"{node} added")
+            elif self.nodes.get(node) != current.nodes[node]:
+                reasons.append(f"{node} changed")
+        for node in old_page["deps"]:
+            if node not in new_page["deps"]:
+                reasons.append(f"{node} removed")
+        return reasons
+
+def asset_signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def build_graph(pages, template_path, basepath, static_dir, minify=False):
+    # pages is a list of (from_path, dest_path); sources are read once here
+    # both for their hash and for the asset references they contain
+    graph = DependencyGraph()
+    with open(template_path, 'r', encoding="utf-8") as file:
+        template_text = file.read()
+    graph.nodes[template_node(template_path)] = hash_file(template_path)
+    graph.nodes[BASEPATH_NODE] = basepath
+    if minify:
+        graph.nodes[MINIFY_NODE] = "on"
+    template_assets = referenced_assets(TEMPLATE_REF_RE.findall(template_text), static_dir)
+    for from_path, dest_path in pages:
+        with open(from_path, 'r', encoding="utf-8") as file:
+            md_text = file.read()
+        graph.nodes[source_node(from_path)] = hash_file(from_path)
+        assets = template_assets | referenced_assets(MARKDOWN_REF_RE.findall(md_text), static_dir)
+        for asset in assets:
+            node = asset_node(asset)
+            if node not in graph.nodes:
+                graph.nodes[node] = asset_signature(asset)
+        deps = [source_node(from_path), template_node(template_path), BASEPATH_NODE]
+        if minify:
+            deps.append(MINIFY_NODE)
+        deps.extend(asset_node(asset) for asset in sorted(assets))
+        graph.add_page(dest_path, from_path, deps)
+    return graph
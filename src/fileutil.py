@@ -0,0 +1,38 @@
+import hashlib
+import json
+import os
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding="utf-8") as file:
+        return json.load(file)
+
+def save_json(path, data):
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding="utf-8") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def hash_file(file_path):
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+# precompressed copies that src.compress writes next to an output
+SIBLING_SUFFIXES = (".gz", ".br")
+
+def remove_output(dest_path, dest_dir_path):
+    os.remove(dest_path)
+    # a server would keep sending the compressed copy of a deleted file
+    for suffix in SIBLING_SUFFIXES:
+        if os.path.exists(dest_path + suffix):
+            os.remove(dest_path + suffix)
+    # prune directories left empty, but never the output root itself
+    root = os.path.abspath(dest_dir_path)
+    dir_path = os.path.dirname(os.path.abspath(dest_path))
+    while dir_path != root and dir_path.startswith(root) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -1,12 +1,22 @@
 import os
 
-from src.markdown_blocks import markdown_to_blocks, block_to_block_type, BlockType
-from src.markdown_html import get_heading_level, markdown_to_html_node
+from src.block_cache import block_cache
+from src.markdown_blocks import iter_blocks, BlockType
+from src.markdown_html import get_heading_level, iter_markdown_html
+from src.output_writer import output_writer
+from src.page import Page
+from src.profiling import profiler, TimedWriter
+from src.search import search_index
+from src.template import load_template
+
+# sources larger than this are streamed instead of parsed into a Page
+STREAM_THRESHOLD = 1 << 20
 
 def extract_title(markdown):
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
+    return extract_title_from_lines(markdown.split("\n"))
+
+def extract_title_from_lines(lines):
+    for block, block_type in iter_blocks(lines):
         if block_type == BlockType.HEADING:
             if get_heading_level(block) == 1:
                 title = block.removeprefix('#')
@@ -18,31 +28,133 @@ def read_file(file_path):
         content = file.read()
     return content
 
-def generate_page(from_path, template_path, dest_path, basepath):
+def write_file(file_path, content):
+    output_writer.write(file_path, content)
+
+def render_page(md_text, template, dest_path=None, from_path=None):
+    # dest_path names the page in the search index and from_path in the
+    # profile, when those are enabled
+    search_index.begin_page()
+    block_cache.begin_page(dest_path)
+    if profiler.enabled:
+        page, html = _render_page_profiled(md_text, template, from_path)
+    else:
+        page = Page.from_markdown(md_text)
+        html = template.render(page.title, page.to_html())
+    block_cache.end_page()
+    if search_index.enabled:
+        search_index.add_page(dest_path, page.title)
+    return html
+
+def _render_page_profiled(md_text, template, from_path):
+    # the text is already read and the HTML is written by the caller, so
+    # only parsing and the template are timed here
+    profiler.begin_page(from_path)
+    try:
+        page = Page.from_markdown(md_text)
+        profiler.start("template")
+        try:
+            html = template.render(page.title, page.to_html())
+        finally:
+            profiler.stop()
+        return page, html
+    finally:
+        profiler.end_page()
+
+def write_page(from_path, dest_path, template):
+    # Pages up to STREAM_THRESHOLD bytes are read and parsed once into a
+    # Page. Larger ones are streamed twice, first for the title (usually the
+    # first block) and then for the body, so memory stays bounded by the
+    # largest block.
+    search_index.begin_page()
+    block_cache.begin_page(dest_path)
+    if profiler.enabled:
+        title = _write_page_profiled(from_path, dest_path, template)
+    else:
+        title = _write_page(from_path, dest_path, template)
+    block_cache.end_page()
+    if search_index.enabled:
+        search_index.add_page(dest_path, title)
+
+def _write_page(from_path, dest_path, template):
+    # returns the page title
+    with open(from_path, 'r', encoding="utf-8") as file:
+        if os.fstat(file.fileno()).st_size <= STREAM_THRESHOLD:
+            page = Page.from_markdown(file.read())
+            with output_writer.open(dest_path) as out:
+                template.write(out, page.title, page.iter_html())
+            return page.title
+        title = extract_title_from_lines(file)
+    with open(from_path, 'r', encoding="utf-8") as file, output_writer.open(dest_path) as out:
+        template.write(out, title, iter_markdown_html(file))
+    return title
+
+def _write_page_profiled(from_path, dest_path, template):
+    profiler.begin_page(from_path)
+    try:
+        with open(from_path, 'r', encoding="utf-8") as file:
+            if os.fstat(file.fileno()).st_size <= STREAM_THRESHOLD:
+                profiler.start("read")
+                try:
+                    md_text = file.read()
+                finally:
+                    profiler.stop()
+                page = Page.from_markdown(md_text)
+                with output_writer.open(dest_path) as out:
+                    profiler.start("template")
+                    try:
+                        template.write(TimedWriter(out, profiler), page.title,
+                                       profiler.timed_iter("serialize", page.iter_html()))
+                    finally:
+                        profiler.stop()
+                return page.title
+        with open(from_path, 'r', encoding="utf-8") as file:
+            profiler.start("title")
+            try:
+                title = extract_title_from_lines(profiler.timed_iter("read", file))
+            finally:
+                profiler.stop()
+        with open(from_path, 'r', encoding="utf-8") as file, output_writer.open(dest_path) as out:
+            profiler.start("template")
+            try:
+                template.write(TimedWriter(out, profiler), title, iter_markdown_html(profiler.timed_iter("read", file)))
+            finally:
+                profiler.stop()
+        return title
+    finally:
+        profiler.end_page()
+
+def generate_page(from_path, template_path, dest_path, basepath, template=None):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    md_text = read_file(from_path)
-    html_template = read_file(template_path)
-    html_div_node = markdown_to_html_node(md_text)
-    html_content = html_div_node.to_html()
-    title = extract_title(md_text)
-    html_template = html_template.replace("{{ Title }}", title)
-    html_template = html_template.replace("{{ Content }}", html_content)
-    html_template = html_template.replace('src="/', f'src="{basepath}')
-    html_template = html_template.replace('href="/', f'href="{basepath}')
-    with open(dest_path, 'w') as file:
-        file.write(html_template)
-
-def generate_page_recursive(dir_path_content, template_path, dest_dir_path, basepath):
+    if template is None:
+        template = load_template(template_path, basepath)
+    write_page(from_path, dest_path, template)
+
+def find_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for path in sorted(os.listdir(dir_path_content)):
+        from_path = os.path.join(dir_path_content, path)
+        if os.path.isfile(from_path):
+            if path.endswith(".md"):
+                html_path = path.replace(".md", ".html")
+                pages.append((from_path, os.path.join(dest_dir_path, html_path)))
+        else:
+            pages.extend(find_pages(from_path, os.path.join(dest_dir_path, path)))
+    return pages
+
+def generate_page_recursive(dir_path_content, template_path, dest_dir_path, basepath, template=None):
     print(f"Generating dir from {dir_path_content} to {dest_dir_path} using {template_path}")
+    if template is None:
+        template = load_template(template_path, basepath)
     for path in os.listdir(dir_path_content):
         from_path = os.path.join(dir_path_content, path)
         if os.path.isfile(from_path) and path.endswith(".md"):
             html_path = path.replace(".md", ".html")
             dest_path = os.path.join(dest_dir_path, html_path)
-            generate_page(from_path, template_path, dest_path, basepath)
+            generate_page(from_path, template_path, dest_path, basepath, template)
         else:
             new_dir_path_content = os.path.join(dir_path_content, path)
             new_dest_dir_path = os.path.join(dest_dir_path, path)
             print(f"created dir: {new_dest_dir_path}")
-            os.makedirs(new_dest_dir_path)
-            generate_page_recursive(new_dir_path_content, template_path, new_dest_dir_path, basepath)
+            os.makedirs(new_dest_dir_path, exist_ok=True)
+            generate_page_recursive(new_dir_path_content, template_path, new_dest_dir_path, basepath, template)
@@ -1,5 +1,7 @@
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -12,15 +14,14 @@ class HTMLNode:
     def props_to_html(self):
         if self.props is None:
             return ""
-        props_html = ""
-        for key, value in self.props.items():
-            props_html += f" {key}=\"{value}\""
-        return props_html
+        return "".join(f" {key}=\"{value}\"" for key, value in self.props.items())
     
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -39,18 +40,38 @@ class LeafNode(HTMLNode):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("ParentNode must have a tag")
-        if self.children is None:
-            raise ValueError("ParentNode must have children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return "".join(iter_html(self))
     
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+def iter_html(node):
+    # walks the tree once with an explicit stack and yields markup fragments
+    # in document order; closing tags are pushed as plain strings
+    stack = [node]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        item = pop()
+        if type(item) is str:
+            yield item
+        elif isinstance(item, ParentNode):
+            if item.tag is None:
+                raise ValueError("ParentNode must have a tag")
+            if item.children is None:
+                raise ValueError("ParentNode must have children")
+            yield f"<{item.tag}{item.props_to_html()}>"
+            push(f"</{item.tag}>")
+            stack.extend(reversed(item.children))
+        else:
+            yield item.to_html()
+
+def write_html(node, file):
+    file.writelines(iter_html(node))
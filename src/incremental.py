@@ -0,0 +1,63 @@
+import os
+
+from src.depgraph import DependencyGraph, build_graph
+from src.fileutil import remove_output
+from src.generate_page import find_pages
+from src.minify import minify_stats
+from src.parallel import generate_pages
+from src.search import search_index
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, basepath, manifest_path,
+                               jobs=1, static_dir="./static", explain=False, search_cache_path=None):
+    old_graph = DependencyGraph.load(manifest_path)
+    pages = find_pages(dir_path_content, dest_dir_path)
+    graph = build_graph(pages, template_path, basepath, static_dir, minify_stats.enabled)
+    # with search on, pages missing from the index are rendered again to
+    # collect their text, even if their output is current
+    indexed = search_index.indexed_pages(search_cache_path) if search_index.enabled else None
+
+    stale = []
+    for from_path, dest_path in pages:
+        reasons = old_graph.stale_reasons(dest_path, graph)
+        if not reasons and indexed is not None and dest_path not in indexed:
+            reasons = ["not in search index"]
+        if reasons:
+            stale.append((from_path, dest_path))
+            if explain:
+                print(f"Rebuilding {dest_path}: {'; '.join(reasons)}")
+    generate_pages(stale, template_path, basepath, jobs)
+
+    if old_graph.pages:
+        gone = [dest_path for dest_path in sorted(old_graph.pages)
+                if dest_path not in graph.pages and os.path.exists(dest_path)]
+    else:
+        # without a manifest nothing says which outputs were pages, so any
+        # page-like output that no current source writes is taken as one
+        gone = untracked_pages(dest_dir_path, graph, static_dir)
+    for dest_path in gone:
+        print(f"Removing stale page {dest_path}")
+        if explain:
+            if dest_path in old_graph.pages:
+                print(f"  source {old_graph.pages[dest_path]['source']} was removed")
+            else:
+                print("  no source writes it")
+        remove_output(dest_path, dest_dir_path)
+    removed = len(gone)
+
+    graph.save(manifest_path)
+    print(f"Rebuilt {len(stale)} of {len(pages)} pages, removed {removed} stale pages")
+
+def untracked_pages(dest_dir_path, graph, static_dir):
+    # .html files under dest_dir_path that are neither a page of graph nor
+    # a copy of a static asset
+    found = []
+    for parent, dir_names, file_names in os.walk(dest_dir_path):
+        dir_names.sort()
+        for name in sorted(file_names):
+            if not name.endswith(".html"):
+                continue
+            dest_path = os.path.join(parent, name)
+            rel_path = os.path.relpath(dest_path, dest_dir_path)
+            if dest_path not in graph.pages and not os.path.exists(os.path.join(static_dir, rel_path)):
+                found.append(dest_path)
+    return found
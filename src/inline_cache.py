@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+from src.stats import Counters, register
+
+class InlineCache(Counters):
+    """Bounded LRU map from raw inline markdown to its rendered HTML.
+
+    Disabled (and never consulted) until enable() is called with a size.
+    """
+
+    COUNTERS = ("hits", "misses")
+
+    def __init__(self):
+        self.enabled = False
+        self.maxsize = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def enable(self, maxsize):
+        self.enabled = maxsize > 0
+        self.maxsize = maxsize
+        self.entries.clear()
+
+    def get(self, text):
+        html = self.entries.get(text)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return html
+
+    def put(self, text, html):
+        self.entries[text] = html
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        summary = f"Inline cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate)"
+        if self.entries:
+            # worker processes keep their own entries, only counters come back
+            summary += f", {len(self.entries)}/{self.maxsize} entries"
+        return summary
+
+inline_cache = register("inline_cache", InlineCache())
@@ -1,17 +1,168 @@
 from src.textnode import TextNode, TextType
 import re
 
+# a whole image or link is tried before falling back to a bare bracket token;
+# the leading lookahead lets the regex engine skip plain text quickly
+INLINE_TOKEN_RE = re.compile(r"(?=[*_`!\[])(?:\*\*|[_`]|(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)|!?\[)")
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+IMAGE_OR_LINK_RE = re.compile(r"(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def text_to_textnodes(text):
+    # One left-to-right scan that produces the same nodes as running
+    # split_nodes_delimiter for **, _ and `, then split_nodes_image and
+    # split_nodes_link. Those passes give ** precedence over _ over `, and
+    # images and links only match inside plain text, so a span opened by a
+    # lower delimiter must close before the next higher one.
     if not text:
         return []
-    node = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(node, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    if "_" not in text and "`" not in text and "**" not in text:
+        # nothing for the delimiter passes to split, which is common in
+        # link-heavy text: images and links alone come from one finditer
+        return _image_and_link_nodes(text)
+    if text.count("**") % 2:
+        raise Exception("missing closing delimiter: **")
+    nodes = []
+    append = nodes.append
+    plain = TextType.TEXT
+    code_error = False
+    run_start = 0
+    pos = 0
+    # set below an image that starts inside a link, see _image_in_link
+    limit = len(text)
+    search = INLINE_TOKEN_RE.search
+    # where the next ** and _ are: a token looks ahead to them, and asking
+    # again from every token would rescan the rest of the text each time
+    bold = _NextFinder(text, "**")
+    italic = _NextFinder(text, "_")
+    delimiters = None
+    while True:
+        match = search(text, pos, limit)
+        if match is None:
+            if limit == len(text):
+                break
+            pos, limit = limit, len(text)
+            continue
+        start, end = match.span()
+        bang, label, url = match.groups()
+        char = text[start]
+        if url is not None:
+            whole = text[start:end]
+            if "_" in whole or "`" in whole or "**" in whole:
+                # a delimiter pass would have cut this image/link apart
+                pos = start + (2 if bang else 1)
+                continue
+            if not bang and "![" in url:
+                if delimiters is None:
+                    delimiters = _NextFinder(text, "`"), bold, italic
+                image_start = _image_in_link(text, start, end, _next_of(delimiters, end))
+                if image_start != -1:
+                    pos, limit = start + 1, image_start
+                    continue
+            node = TextNode(label, TextType.IMAGE if bang else TextType.LINK, url)
+        elif char == "*":
+            closing = text.find("**", start + 2)
+            node = TextNode(text[start + 2:closing], TextType.BOLD)
+            end = closing + 2
+        elif char == "_":
+            closing = text.find("_", start + 1)
+            next_bold = bold.at(start + 1)
+            if closing == -1 or next_bold != -1 and next_bold < closing:
+                raise Exception("missing closing delimiter: _")
+            node = TextNode(text[start + 1:closing], TextType.ITALIC)
+            end = closing + 1
+        elif char == "`":
+            closing = text.find("`", start + 1)
+            boundary = _next_of((bold, italic), start + 1)
+            if closing == -1 or boundary != len(text) and boundary < closing:
+                # the ` error only surfaces if no _ error does, which the
+                # multi-pass split would have raised first
+                code_error = True
+                if boundary == len(text):
+                    break
+                pos = boundary
+                continue
+            node = TextNode(text[start + 1:closing], TextType.CODE)
+            end = closing + 1
+        else:
+            # a bare [ or ![ that does not start an image or link
+            pos = end
+            continue
+        if start > run_start:
+            append(TextNode(text[run_start:start], plain))
+        append(node)
+        pos = run_start = end
+    if code_error:
+        raise Exception("missing closing delimiter: `")
+    if run_start < len(text):
+        append(TextNode(text[run_start:], plain))
     return nodes
 
+def _image_and_link_nodes(text):
+    # split_nodes_link(split_nodes_image(...)) of a single text node
+    nodes = []
+    append = nodes.append
+    plain, image, link = TextType.TEXT, TextType.IMAGE, TextType.LINK
+    cursor = 0
+    for match in IMAGE_OR_LINK_RE.finditer(text):
+        bang, label, url = match.groups()
+        if not bang and "![" in url:
+            # an image inside the link's URL, which the general split sorts out
+            return split_nodes_images_and_links([TextNode(text, plain)])
+        start = match.start()
+        if start > cursor:
+            append(TextNode(text[cursor:start], plain))
+        append(TextNode(label, image if bang else link, url))
+        cursor = match.end()
+    if cursor < len(text):
+        append(TextNode(text[cursor:], plain))
+    return nodes
+
+class _NextFinder:
+    """Position of the next needle in text at or after a given position.
+
+    The last answer is reused while it is still ahead, so positions that
+    only move forward search every part of the text at most once.
+    """
+
+    __slots__ = ("text", "needle", "start", "found")
+
+    def __init__(self, text, needle):
+        self.text = text
+        self.needle = needle
+        self.start = 0
+        # not searched yet
+        self.found = -2
+
+    def at(self, pos):
+        # found is the first needle at or after start, -1 if there is none
+        if pos < self.start or self.found != -1 and self.found < pos:
+            self.start = pos
+            self.found = self.text.find(self.needle, pos)
+        return self.found
+
+def _next_of(finders, pos):
+    # the nearest of the finders' needles at or after pos, else len(text)
+    nearest = len(finders[0].text)
+    for finder in finders:
+        found = finder.at(pos)
+        if found != -1 and found < nearest:
+            nearest = found
+    return nearest
+
+def _image_in_link(text, start, end, endpos):
+    # Images are split out before links, so an image that starts inside the
+    # URL of the link text[start:end] wins over the link, and only the text
+    # before the image can still hold links. Returns the image's start or -1.
+    # Only the "![" inside the link are tried, so each link is looked at once
+    # instead of searching on to endpos for an image that starts too late.
+    image_start = text.find("![", start + 1, end)
+    while image_start != -1:
+        if IMAGE_RE.match(text, image_start, endpos):
+            return image_start
+        image_start = text.find("![", image_start + 2, end)
+    return -1
+
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
@@ -38,46 +189,65 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-        text = node.text
-        pairs = extract_markdown_images(text)
-        for alt, url in pairs:
-            before, after = text.split(f"![{alt}]({url})", 1)
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            text = after
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
-    return new_nodes
+    return _split_nodes_spans(old_nodes, _image_spans)
 
 
 def split_nodes_link(old_nodes):
+    return _split_nodes_spans(old_nodes, _link_spans)
+
+
+def split_nodes_images_and_links(old_nodes):
+    # same nodes as split_nodes_link(split_nodes_image(old_nodes)), with one
+    # scan of each text node
+    return _split_nodes_spans(old_nodes, extract_markdown_spans)
+
+def _split_nodes_spans(old_nodes, find_spans):
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
         text = node.text
-        pairs = extract_markdown_links(text)
-        for alt, url in pairs:
-            before, after = text.split(f"[{alt}]({url})", 1)
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.LINK, url))
-            text = after
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
+        cursor = 0
+        for start, end, text_type, label, url in find_spans(text):
+            if start > cursor:
+                new_nodes.append(TextNode(text[cursor:start], TextType.TEXT))
+            new_nodes.append(TextNode(label, text_type, url))
+            cursor = end
+        if cursor < len(text):
+            new_nodes.append(TextNode(text[cursor:], TextType.TEXT))
     return new_nodes
 
+def _image_spans(text):
+    return [(*match.span(), TextType.IMAGE, *match.groups()) for match in IMAGE_RE.finditer(text)]
+
+def _link_spans(text):
+    return [(*match.span(), TextType.LINK, *match.groups()) for match in LINK_RE.finditer(text)]
+
+def extract_markdown_spans(text):
+    # images and links in one scan, as (start, end, text_type, label, url)
+    # tuples in text order; text[start:end] is the whole ![..](..) or [..](..)
+    spans = []
+    append = spans.append
+    image, link = TextType.IMAGE, TextType.LINK
+    pos = 0
+    limit = len(text)
+    while True:
+        for match in IMAGE_OR_LINK_RE.finditer(text, pos, limit):
+            bang, label, url = match.groups()
+            if not bang and "![" in url:
+                image_start = _image_in_link(text, match.start(), match.end(), len(text))
+                if image_start != -1:
+                    pos, limit = match.start() + 1, image_start
+                    break
+            append((*match.span(), image if bang else link, label, url))
+        else:
+            if limit == len(text):
+                return spans
+            pos, limit = limit, len(text)
+
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return IMAGE_RE.findall(text)
 
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
-
-        
\ No newline at end of file
+    return LINK_RE.findall(text)
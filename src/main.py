@@ -1,31 +1,281 @@
+import argparse
 import os
-import shutil
 import sys
 
-from src.copy_static import copy_files_recursive
-from src.generate_page import generate_page, generate_page_recursive
+# Subcommands import what they use when they run, so that parsing arguments
+# and commands like render-one do not pay for the whole build pipeline.
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
+dir_path_cache = "./.cache"
 template_path = "./template.html"
+manifest_path = os.path.join(dir_path_cache, "manifest.json")
+static_manifest_path = os.path.join(dir_path_cache, "static.json")
+block_cache_path = os.path.join(dir_path_cache, "blocks")
+compress_manifest_path = os.path.join(dir_path_cache, "compress.json")
+search_cache_path = os.path.join(dir_path_cache, "search.json")
+search_dir_path = os.path.join(dir_path_public, "search")
+compress_cache_path = os.path.join(dir_path_cache, "compressed")
 
 default_basepath = "/"
+default_port = 8888
 
-def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+COMMANDS = ("build", "serve", "watch", "render-one")
 
+def parse_args(argv):
+    # "python3 -m src.main [basepath] [options]" predates the subcommands and
+    # still means build
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["build", *argv]
+    parser = argparse.ArgumentParser(prog="src.main", description="Build, preview or render the static site")
+    commands = parser.add_subparsers(dest="command", metavar="{" + ",".join(COMMANDS) + "}")
+
+    build_parser = commands.add_parser("build", help="build the site into ./docs (the default)",
+                                       description="Build the static site into ./docs")
+    build_parser.add_argument("basepath", nargs="?", default=default_basepath,
+                              help="prefix for root-relative src/href links (default: /)")
+    build_parser.add_argument("--incremental", action="store_true",
+                              help="keep ./docs and re-render only pages whose inputs changed")
+    build_parser.add_argument("--explain", action="store_true",
+                              help="with --incremental, print which changed inputs caused each page to be rebuilt")
+    build_parser.add_argument("-j", "--jobs", type=int, default=1,
+                              help="render pages on N worker processes (0 = one per CPU)")
+    build_parser.add_argument("--pipeline", action="store_true",
+                              help="overlap reading, rendering and writing pages on an asyncio pipeline (full builds)")
+    build_parser.add_argument("--read-depth", type=int, default=16, metavar="N",
+                              help="with --pipeline, sources read ahead of rendering (default: 16)")
+    build_parser.add_argument("--write-depth", type=int, default=16, metavar="N",
+                              help="with --pipeline, rendered pages queued for writing (default: 16)")
+    build_parser.add_argument("--static-hash", action="store_true",
+                              help="when syncing static files, compare content hashes if size matches but mtime differs")
+    build_parser.add_argument("--static-link", choices=["copy", "hardlink", "reflink"], default="copy",
+                              help="how to place static files; hardlink/reflink fall back to copying where unsupported")
+    build_parser.add_argument("--copy-jobs", type=int,
+                              help="threads used to copy static files (default: 16)")
+    build_parser.add_argument("--minify", action="store_true",
+                              help="strip comments and collapse whitespace in pages, leaving pre/code content intact")
+    build_parser.add_argument("--search", action="store_true",
+                              help="write a client-side search index, sharded by term prefix, to ./docs/search")
+    build_parser.add_argument("--compress", action="store_true",
+                              help="write .gz (and .br if brotli is installed) siblings of text files in ./docs")
+    build_parser.add_argument("--compress-min-size", type=int, metavar="BYTES",
+                              help="with --compress, leave files smaller than BYTES uncompressed (default: 1024)")
+    build_parser.add_argument("--inline-cache", type=int, default=0, metavar="N",
+                              help="memoize the HTML of up to N distinct inline texts across pages (default: off)")
+    build_parser.add_argument("--block-cache", action="store_true",
+                              help=f"reuse the blocks each page rendered in its last build, stored per page in {block_cache_path}")
+    build_parser.add_argument("--profile", action="store_true",
+                              help="time each build stage and print the slowest stages and pages; with --pipeline, "
+                                   "reads and writes are timed per batch and left out of the page times")
+    build_parser.add_argument("--profile-json", metavar="PATH",
+                              help="also write the per-stage and per-page timings to PATH (implies --profile)")
+    build_parser.set_defaults(run=run_build)
+
+    serve_parser = commands.add_parser("serve", help="serve ./docs over HTTP",
+                                       description="Serve the built site in ./docs")
+    serve_parser.add_argument("--host", default="localhost")
+    serve_parser.add_argument("--port", type=int, default=default_port)
+    serve_parser.set_defaults(run=run_serve)
+
+    watch_parser = commands.add_parser("watch", help="rebuild on change and serve ./docs with live reload",
+                                       description="Rebuild on change and serve ./docs with live reload")
+    watch_parser.add_argument("basepath", nargs="?", default=default_basepath)
+    watch_parser.add_argument("--host", default="localhost")
+    watch_parser.add_argument("--port", type=int, default=default_port)
+    watch_parser.add_argument("--interval", type=float, default=0.2, help="seconds between polls (default: 0.2)")
+    watch_parser.set_defaults(run=run_watch)
+
+    render_parser = commands.add_parser("render-one", help="render a single markdown file",
+                                        description="Render one markdown file with the site template")
+    render_parser.add_argument("source", help="markdown file to render, or - for standard input")
+    render_parser.add_argument("dest", nargs="?", help="output file (default: standard output)")
+    render_parser.add_argument("--basepath", default=default_basepath)
+    render_parser.add_argument("--template", default=template_path)
+    render_parser.add_argument("--no-template", action="store_true",
+                               help="output only the rendered content, without the page template")
+    render_parser.set_defaults(run=run_render_one)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    args.run(args)
+
+def run_build(args):
+    from src.block_cache import block_cache
+    from src.inline_cache import inline_cache
+    from src.minify import minify_stats
+    from src.output_writer import output_writer
+    from src.profiling import profiler
+    from src.search import search_index
+
+    if args.profile or args.profile_json:
+        profiler.enable()
+    inline_cache.enable(args.inline_cache)
+    block_cache.enable(block_cache_path if args.block_cache else None)
+    minify_stats.enable(args.minify)
+    search_index.enable(args.search)
+    build(args)
+    if args.search:
+        write_search_index(args)
+    if args.compress:
+        compress_public(args)
+    print(output_writer.summary())
+    if minify_stats.enabled:
+        print(minify_stats.summary())
+    if inline_cache.enabled:
+        print(inline_cache.summary())
+    if block_cache.enabled:
+        prune_block_cache()
+        print(block_cache.summary())
+    if profiler.enabled:
+        print(profiler.summary())
+        if args.profile_json:
+            profiler.write_json(args.profile_json)
+            print(f"Wrote profile to {args.profile_json}")
+
+def run_serve(args):
+    from src.serve import serve
+    serve(dir_path_public, args.host, args.port)
+
+def run_watch(args):
+    from src.watch import SiteWatcher, watch
+    drop_compressed_siblings()
+    watcher = SiteWatcher(dir_path_content, dir_path_static, template_path, dir_path_public,
+                          args.basepath, static_manifest_path, manifest_path)
+    watch(watcher, args.host, args.port, args.interval)
+
+def run_render_one(args):
+    from src.template import load_template
+
+    template = None if args.no_template else load_template(args.template, args.basepath, minify=False)
+    if args.source == "-":
+        render_one(sys.stdin, args.dest, template, args.basepath)
+        return
+    with open(args.source, 'r', encoding="utf-8") as source:
+        render_one(source, args.dest, template, args.basepath)
+
+def render_one(source, dest, template, basepath):
+    from src.output_writer import output_writer
+    from src.render import write_markdown
+
+    if dest is None:
+        write_markdown(sys.stdout, source, template, basepath)
+        return
+    output_writer.prepare([dest])
+    with output_writer.open(dest) as out:
+        write_markdown(out, source, template, basepath)
+
+def copy_static(args):
+    from src.copy_static import DEFAULT_COPY_JOBS, copy_files_recursive, sync_files_recursive
+    from src.profiling import profiler
+
+    copy_jobs = DEFAULT_COPY_JOBS if args.copy_jobs is None else args.copy_jobs
+    if profiler.enabled:
+        profiler.start("static")
+    try:
+        if args.incremental or args.static_link != "copy":
+            print("Syncing static files to public directory...")
+            sync_files_recursive(dir_path_static, dir_path_public, static_manifest_path,
+                                 args.static_hash, args.static_link, copy_jobs)
+        else:
+            print("Copying static files to public directory...")
+            copy_files_recursive(dir_path_static, dir_path_public, copy_jobs, static_manifest_path)
+    finally:
+        if profiler.enabled:
+            profiler.stop()
+
+def prune_block_cache():
+    from src.block_cache import block_cache
+    from src.generate_page import find_pages
+
+    pages = find_pages(dir_path_content, dir_path_public)
+    removed = block_cache.prune(dest_path for _, dest_path in pages)
+    if removed:
+        print(f"Block cache: removed {removed} stores of pages that no longer exist")
+
+def write_search_index(args):
+    from src.generate_page import find_pages
+    from src.profiling import profiler
+    from src.search import search_index
+
+    if profiler.enabled:
+        profiler.start("search")
+    try:
+        dest_paths = [dest_path for _, dest_path in find_pages(dir_path_content, dir_path_public)]
+        search_index.write(dir_path_public, args.basepath, search_cache_path, dest_paths)
+    finally:
+        if profiler.enabled:
+            profiler.stop()
+
+def compress_public(args):
+    from src.compress import DEFAULT_MIN_SIZE, SiblingCompressor
+    from src.profiling import profiler
+
+    min_size = DEFAULT_MIN_SIZE if args.compress_min_size is None else args.compress_min_size
+    if profiler.enabled:
+        profiler.start("compress")
+    try:
+        compressor = SiblingCompressor(compress_manifest_path, compress_cache_path)
+        compressor.run(dir_path_public, min_size)
+    finally:
+        if profiler.enabled:
+            profiler.stop()
+
+def drop_compressed_siblings():
+    # only a --compress build keeps the .gz/.br siblings in step with the
+    # files they copy
+    if os.path.exists(compress_manifest_path):
+        from src.compress import remove_siblings
+        removed = remove_siblings(compress_manifest_path)
+        print(f"Removed {removed} compressed siblings")
+
+def build(args):
+    basepath = args.basepath
+    if not args.compress:
+        drop_compressed_siblings()
+    if not args.search and os.path.exists(search_cache_path):
+        # pages rendered now are not indexed, so the index and its cache
+        # would go stale behind an incremental --search build's back
+        import shutil
+        os.remove(search_cache_path)
+        if os.path.isdir(search_dir_path):
+            shutil.rmtree(search_dir_path)
+
+    if args.incremental:
+        from src.incremental import generate_pages_incremental
+        copy_static(args)
+        generate_pages_incremental(dir_path_content, template_path, dir_path_public, basepath, manifest_path,
+                                   args.jobs, dir_path_static, args.explain, search_cache_path)
+        return
+
+    import shutil
+    from src.depgraph import build_graph
+    from src.generate_page import find_pages
+    from src.minify import minify_stats
     print("Deleting public directory...")
     if os.path.exists(dir_path_public):
         shutil.rmtree(dir_path_public)
-    
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
-    generate_page_recursive(dir_path_content, template_path, dir_path_public, basepath)
-
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    # the graph is saved once every page is written, so the next
+    # --incremental build knows which outputs it owns
+    graph = build_graph(find_pages(dir_path_content, dir_path_public), template_path, basepath,
+                        dir_path_static, minify_stats.enabled)
 
+    copy_static(args)
+    if args.pipeline:
+        from src.pipeline import generate_pages_pipelined
+        generate_pages_pipelined(dir_path_content, template_path, dir_path_public, basepath, args.jobs,
+                                 args.read_depth, args.write_depth)
+    elif args.jobs == 1:
+        from src.generate_page import generate_page_recursive
+        generate_page_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    else:
+        from src.parallel import generate_pages
+        pages = find_pages(dir_path_content, dir_path_public)
+        generate_pages(pages, template_path, basepath, args.jobs)
+    graph.save(manifest_path)
 
 if __name__ == "__main__":
     main()
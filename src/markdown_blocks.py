@@ -20,30 +20,112 @@ def markdown_to_blocks(markdown):
     return cleaned_blocks   
 
 def block_to_block_type(markdown_block):
-    lines = markdown_block.split("\n")
+    return lines_to_block_type(markdown_block.split("\n"))
 
-    is_code = len(lines) >= 2 and lines[0] == "```" and lines[-1] == "```"
-    if is_code:
+def lines_to_block_type(lines):
+    # The first line allows at most one of the quote and list types, so only
+    # that type is checked on the other lines, stopping at the first line that
+    # does not match. Paragraphs are decided by the first line alone.
+    line0 = lines[0]
+    if line0 == "```" and len(lines) >= 2 and lines[-1] == "```":
         return BlockType.CODE
+    if line0.startswith(">"):
+        if all(line.startswith(">") for line in lines):
+            return BlockType.QUOTE
+    elif line0.startswith("- "):
+        if all(line.startswith("- ") for line in lines):
+            return BlockType.UNORDERED_LIST
+    elif line0.startswith("1. "):
+        if all(line.startswith(f"{i}. ") for i, line in enumerate(lines, 1)):
+            return BlockType.ORDERED_LIST
+    return _heading_or_paragraph(line0)
 
-    is_quote = all(line.startswith(">") for line in lines)
-    if is_quote:
-        return BlockType.QUOTE
+def iter_blocks(lines):
+    # Streaming equivalent of markdown_to_blocks + block_to_block_type: takes
+    # any iterable of lines (a list, or an open file) and yields
+    # (block, block_type) pairs.
+    for block, _, block_type in iter_block_lines(lines):
+        yield block, block_type
 
-    is_unordered_list = all(line.startswith("- ") for line in lines)
-    if is_unordered_list:
-        return BlockType.UNORDERED_LIST
+def iter_block_lines(lines):
+    # Like iter_blocks, but also yields each block's lines so converters do
+    # not have to split the block again. Blocks end at empty lines; like
+    # strip(), the leading and trailing whitespace of a block is dropped, so
+    # each line's check runs one line late, once it is known not to be the
+    # last one.
+    state = None
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if not line:
+            if state is not None:
+                yield state.finish()
+                state = None
+        elif state is None:
+            if line.strip():
+                state = _BlockState(line.lstrip())
+        else:
+            state.add(line)
+    if state is not None:
+        yield state.finish()
 
-    is_ordered_list = all(line.startswith(f"{i+1}. ") for i, line in enumerate(lines))
-    if is_ordered_list:
-        return BlockType.ORDERED_LIST
+class _BlockState:
+    def __init__(self, first_line):
+        self.lines = [first_line]
+        self.blank = []
+        self.checked = 0
+        # the only list/quote type still possible, set by the first line
+        self.block_type = None
 
-    line0 = lines[0]
+    def add(self, line):
+        if not line.strip():
+            # only part of the block if more content follows
+            self.blank.append(line)
+            return
+        self.check(self.lines[-1])
+        for blank_line in self.blank:
+            self.check(blank_line)
+        self.lines.extend(self.blank)
+        self.blank = []
+        self.lines.append(line)
+
+    def check(self, line):
+        self.checked += 1
+        block_type = self.block_type
+        if self.checked == 1:
+            if line.startswith(">"):
+                self.block_type = BlockType.QUOTE
+            elif line.startswith("- "):
+                self.block_type = BlockType.UNORDERED_LIST
+            elif line.startswith("1. "):
+                self.block_type = BlockType.ORDERED_LIST
+        elif block_type is None:
+            return
+        elif block_type == BlockType.QUOTE:
+            if not line.startswith(">"):
+                self.block_type = None
+        elif block_type == BlockType.UNORDERED_LIST:
+            if not line.startswith("- "):
+                self.block_type = None
+        elif not line.startswith(f"{self.checked}. "):
+            self.block_type = None
+
+    def finish(self):
+        lines = self.lines
+        lines[-1] = lines[-1].rstrip()
+        self.check(lines[-1])
+        block = "\n".join(lines)
+        if len(lines) >= 2 and lines[0] == "```" and lines[-1] == "```":
+            return block, lines, BlockType.CODE
+        if self.block_type is not None:
+            return block, lines, self.block_type
+        return block, lines, _heading_or_paragraph(lines[0])
+
+def _heading_or_paragraph(line0):
     if line0.startswith("#"):
         count = 0
         while count < len(line0) and line0[count] == "#":
             count += 1
         if 1 <= count <= 6 and count < len(line0) and line0[count] == " ":
             return BlockType.HEADING
-
     return BlockType.PARAGRAPH
@@ -1,45 +1,115 @@
-from src.markdown_blocks import markdown_to_blocks, block_to_block_type, BlockType
+from src.markdown_blocks import iter_block_lines, lines_to_block_type, BlockType
 from src.inline_markdown import text_to_textnodes
-from src.htmlnode import ParentNode
+from src.block_cache import block_cache
+from src.htmlnode import LeafNode, ParentNode, iter_html
+from src.inline_cache import inline_cache
+from src.profiling import profiler
+from src.search import search_index
 from src.textnode import text_node_to_html_node, TextNode, TextType
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    for block, lines, block_type in iter_block_lines(markdown.split("\n")):
+        if block_cache.enabled:
+            html_node = LeafNode(None, cached_block_html(block, block_type, lines))
+        else:
+            html_node = block_to_html_node(block, block_type, lines)
         children.append(html_node)
     return ParentNode("div", children)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def iter_markdown_html(lines):
+    # same markup as markdown_to_html_node(...).to_html(), but only one block
+    # is held in memory at a time
+    if profiler.enabled:
+        yield from _iter_markdown_html_profiled(lines)
+        return
+    yield "<div>"
+    if block_cache.enabled:
+        for block, block_lines, block_type in iter_block_lines(lines):
+            yield cached_block_html(block, block_type, block_lines)
+    else:
+        for block, block_lines, block_type in iter_block_lines(lines):
+            yield from iter_html(block_to_html_node(block, block_type, block_lines))
+    yield "</div>"
+
+
+def _iter_markdown_html_profiled(lines):
+    yield "<div>"
+    for block, block_lines, block_type in profiler.timed_iter("block_parse", iter_block_lines(lines)):
+        if block_cache.enabled:
+            profiler.start("block_cache")
+            try:
+                html = cached_block_html(block, block_type, block_lines)
+            finally:
+                profiler.stop()
+            yield html
+            continue
+        profiler.start("inline_parse")
+        try:
+            html_node = block_to_html_node(block, block_type, block_lines)
+        finally:
+            profiler.stop()
+        yield from profiler.timed_iter("serialize", iter_html(html_node))
+    yield "</div>"
+
+
+def cached_block_html(block, block_type, lines=None):
+    html = block_cache.get(block, block_type)
+    if html is None:
+        html = block_to_html_node(block, block_type, lines).to_html()
+        block_cache.put(block, block_type, html)
+    elif search_index.enabled:
+        # a hit skips the text nodes the index is fed from
+        search_index.record_html(html)
+    return html
+
+
+def block_to_html_node(block, block_type=None, lines=None):
+    # lines is block split on "\n", shared by the classifier and converters
+    if lines is None:
+        lines = block.split("\n")
+    if block_type is None:
+        block_type = lines_to_block_type(lines)
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(block, lines)
     elif block_type == BlockType.HEADING:
         return heading_to_html_node(block)
     elif block_type == BlockType.CODE:
-        return code_to_html_node(block)
+        return code_to_html_node(block, lines)
     elif block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(block, lines)
     elif block_type == BlockType.UNORDERED_LIST:
-        return ulist_to_html_node(block)
+        return ulist_to_html_node(block, lines)
     elif block_type == BlockType.ORDERED_LIST:
-        return olist_to_html_node(block)
+        return olist_to_html_node(block, lines)
     raise ValueError("invalid block type")
 
 
 def text_to_children(text):
+    if inline_cache.enabled:
+        html = inline_cache.get(text)
+        if html is not None:
+            if search_index.enabled:
+                search_index.record_html(html)
+            return [LeafNode(None, html)]
     text_nodes = text_to_textnodes(text)
+    if search_index.enabled:
+        search_index.record_nodes(text_nodes)
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
         children.append(html_node)
+    if inline_cache.enabled:
+        inline_cache.put(text, "".join(child.to_html() for child in children))
     return children
 
 
-def paragraph_to_html_node(block):
-    paragraph = block.replace('\n', ' ')
+def paragraph_to_html_node(block, lines=None):
+    if lines is None:
+        paragraph = block.replace('\n', ' ')
+    else:
+        paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
@@ -62,17 +132,21 @@ def heading_to_html_node(block):
     return ParentNode(f"h{level}", children)
 
 
-def code_to_html_node(block):
-    lines = block.split("\n")
+def code_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     text = "\n".join(lines[1:-1]) + "\n"
+    if search_index.enabled:
+        search_index.record(text)
     raw_text_node = TextNode(text, TextType.TEXT)
     child = text_node_to_html_node(raw_text_node)
     code = ParentNode("code", [child])
     return ParentNode("pre", [code])
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
@@ -83,20 +157,22 @@ def quote_to_html_node(block):
     return ParentNode("blockquote", children)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[2:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[3:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
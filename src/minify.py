@@ -0,0 +1,133 @@
+import re
+
+from src.stats import Counters, register
+
+# comments first, so a ">" inside one does not end it early; "<!" without
+# "--" is a doctype or similar declaration
+TOKEN_RE = re.compile(r"<!--.*?-->|<!(?!--)[^>]*>|</?[a-zA-Z][^>]*>", re.S)
+TAG_NAME_RE = re.compile(r"<(/?)(!?[a-zA-Z][a-zA-Z0-9-]*)")
+# HTML whitespace; a non-breaking space is content and must survive
+SPACE_RE = re.compile(r"[ \t\n\r\f]+")
+
+# content of these is kept byte for byte
+RAW_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+# whitespace next to these tags does not render, so it is dropped
+BLOCK_TAGS = frozenset((
+    "!doctype", "html", "head", "body", "title", "meta", "link", "base", "style", "script",
+    "article", "aside", "blockquote", "br", "div", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tbody", "td",
+    "tfoot", "th", "thead", "tr", "ul",
+))
+
+def _kept_comment(comment):
+    # conditional comments are markup for old browsers, not commentary
+    return comment.startswith(("<!--[", "<!--<!"))
+
+def _unclosed_comment(text, end):
+    # start of the first comment in text[:end] that is not closed yet, or end
+    pos = 0
+    while True:
+        start = text.find("<!--", pos, end)
+        if start == -1:
+            return end
+        close = text.find("-->", start + 4)
+        if close == -1:
+            return start
+        pos = close + 3
+
+class HtmlMinifier:
+    """Streaming whitespace and comment minifier for rendered HTML.
+
+    Whitespace runs collapse to one space, and are dropped next to block
+    tags; comments are dropped. Text inside pre, code, textarea, script and
+    style is passed through untouched, and so are the tags themselves.
+    feed() may split the markup anywhere: the text after the last complete
+    tag is held back until the tag that follows it is known.
+    """
+
+    def __init__(self):
+        self.pending = ""
+        self.raw_depth = 0
+        self.after_block = False
+        self.saved = 0
+
+    def feed(self, html):
+        text = self.pending + html
+        end = _unclosed_comment(text, len(text))
+        out = []
+        run_start = 0
+        run = []
+        for match in TOKEN_RE.finditer(text, 0, end):
+            token = match.group()
+            run.append(text[run_start:match.start()])
+            run_start = match.end()
+            if token.startswith("<!--") and not self.raw_depth and not _kept_comment(token):
+                # the text on both sides joins into one run
+                self.saved += len(token.encode("utf-8"))
+                continue
+            name_match = TAG_NAME_RE.match(token)
+            closing, name = name_match.groups() if name_match else ("", "")
+            name = name.lower()
+            out.append(self._text("".join(run), name in BLOCK_TAGS))
+            out.append(token)
+            run = []
+            if name in RAW_TAGS and not token.endswith("/>"):
+                self.raw_depth = max(0, self.raw_depth - 1) if closing else self.raw_depth + 1
+            self.after_block = name in BLOCK_TAGS
+        self.pending = "".join(run) + text[run_start:]
+        return "".join(out)
+
+    def end(self):
+        # flushes the held back text; nothing is known about what follows it
+        text = self._text(self.pending, False)
+        self.pending = ""
+        return text
+
+    def _text(self, text, before_block):
+        if not text or self.raw_depth:
+            return text
+        minified = SPACE_RE.sub(" ", text)
+        if self.after_block:
+            minified = minified.lstrip(" ")
+        if before_block:
+            minified = minified.rstrip(" ")
+        # only ASCII whitespace was removed, so characters are bytes here
+        self.saved += len(text) - len(minified)
+        return minified
+
+    def stream(self, fragments):
+        for fragment in fragments:
+            minified = self.feed(fragment)
+            if minified:
+                yield minified
+        yield self.end()
+
+def minify_html(html):
+    minifier = HtmlMinifier()
+    return minifier.feed(html) + minifier.end()
+
+class MinifyStats(Counters):
+    """Counts the bytes HTML minification removed from the pages of a build.
+
+    Disabled until enable() is called; templates loaded while it is enabled
+    minify their own markup once and every page's content as it streams.
+    """
+
+    COUNTERS = ("pages", "saved")
+
+    def __init__(self):
+        self.enabled = False
+        self.pages = 0
+        self.saved = 0
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def add_page(self, saved):
+        self.pages += 1
+        self.saved += saved
+
+    def summary(self):
+        return f"Minify: saved {self.saved / 1024:.1f} KB across {self.pages} pages"
+
+minify_stats = register("minify", MinifyStats())
@@ -0,0 +1,69 @@
+import os
+from contextlib import contextmanager
+
+from src.stats import Counters, register
+
+# large enough that a typical page is written with a single syscall
+WRITE_BUFFER_SIZE = 1 << 20
+COMPARE_CHUNK_SIZE = 1 << 16
+
+def same_contents(path_a, path_b):
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, 'rb') as file_a, open(path_b, 'rb') as file_b:
+        while True:
+            chunk = file_a.read(COMPARE_CHUNK_SIZE)
+            if chunk != file_b.read(COMPARE_CHUNK_SIZE):
+                return False
+            if not chunk:
+                return True
+
+class OutputWriter(Counters):
+    """Writes rendered pages atomically, leaving unchanged outputs alone.
+
+    Every page goes to a buffered utf-8 temp file next to its destination
+    and is renamed over it only if the bytes differ, so an output is never
+    seen half written and unchanged outputs keep their mtime.
+    """
+
+    COUNTERS = ("written", "unchanged", "bytes_written")
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_written = 0
+
+    def prepare(self, dest_paths):
+        # one makedirs per distinct directory, ahead of any write
+        for dest_dir in sorted({os.path.dirname(dest_path) for dest_path in dest_paths}):
+            if dest_dir:
+                os.makedirs(dest_dir, exist_ok=True)
+
+    @contextmanager
+    def open(self, dest_path):
+        tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as file:
+                yield file
+            if os.path.exists(dest_path) and same_contents(tmp_path, dest_path):
+                os.remove(tmp_path)
+                self.unchanged += 1
+                return
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.written += 1
+        self.bytes_written += size
+
+    def write(self, dest_path, content):
+        with self.open(dest_path) as file:
+            file.write(content)
+
+    def summary(self):
+        return (f"Output: wrote {self.written} pages ({self.bytes_written / 1e6:.1f} MB), "
+                f"skipped {self.unchanged} unchanged")
+
+output_writer = register("output_writer", OutputWriter())
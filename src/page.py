@@ -0,0 +1,121 @@
+import re
+
+from src.block_cache import block_cache
+from src.htmlnode import LeafNode, ParentNode, iter_html
+from src.markdown_blocks import iter_block_lines, BlockType
+from src.markdown_html import block_to_html_node, cached_block_html, get_heading_level
+from src.profiling import profiler
+
+SLUG_RE = re.compile(r"[^a-z0-9]+")
+TAG_RE = re.compile(r"<[^>]*>")
+
+class Page:
+    """A markdown page parsed once.
+
+    blocks holds the (block, block_type) pairs, nodes the HTML node of each
+    block and outline the (level, text, slug) of each heading, in document
+    order. The title, table of contents and HTML body are all derived from
+    these, so the source is never parsed a second time.
+    """
+
+    __slots__ = ("blocks", "nodes", "outline", "heading_blocks", "_title")
+
+    def __init__(self, lines):
+        self.blocks = []
+        self.nodes = []
+        self.outline = []
+        # index into blocks/nodes of each outline entry
+        self.heading_blocks = []
+        self._title = None
+        slugs = set()
+        block_lines_iter = iter_block_lines(lines)
+        if profiler.enabled:
+            block_lines_iter = profiler.timed_iter("block_parse", block_lines_iter)
+        for block, block_lines, block_type in block_lines_iter:
+            if profiler.enabled:
+                profiler.start("block_cache" if block_cache.enabled else "inline_parse")
+                try:
+                    node = _block_node(block, block_type, block_lines)
+                finally:
+                    profiler.stop()
+            else:
+                node = _block_node(block, block_type, block_lines)
+            if block_type == BlockType.HEADING:
+                level = get_heading_level(block)
+                if level == 1 and self._title is None:
+                    self._title = block.removeprefix('#').lstrip()
+                # the heading's text without markup, taken from its HTML so
+                # the inline markdown is not parsed again
+                text = TAG_RE.sub("", node.to_html())
+                self.outline.append((level, text, _unique_slug(text, slugs)))
+                self.heading_blocks.append(len(self.blocks))
+            self.blocks.append((block, block_type))
+            self.nodes.append(node)
+
+    @classmethod
+    def from_markdown(cls, markdown):
+        return cls(markdown.split("\n"))
+
+    @property
+    def title(self):
+        if self._title is None:
+            raise Exception("There is no title found")
+        return self._title
+
+    def html_node(self):
+        return ParentNode("div", self.nodes)
+
+    def iter_html(self, heading_ids=False):
+        # same markup as markdown_to_html_node(...).to_html(); with
+        # heading_ids, headings get the id their toc() entry links to
+        yield "<div>"
+        if heading_ids:
+            slugs = {index: slug for index, (_, _, slug) in zip(self.heading_blocks, self.outline)}
+        for index, node in enumerate(self.nodes):
+            if heading_ids and index in slugs:
+                html = node.to_html()
+                tag_end = html.index(">")
+                yield f'{html[:tag_end]} id="{slugs[index]}"{html[tag_end:]}'
+            else:
+                yield from iter_html(node)
+        yield "</div>"
+
+    def to_html(self, heading_ids=False):
+        return "".join(self.iter_html(heading_ids))
+
+    def toc(self):
+        # nested <ul> of links to the headings, or None for a page without any
+        if not self.outline:
+            return None
+        return _toc_list(self.outline)
+
+def _block_node(block, block_type, lines):
+    if block_cache.enabled:
+        return LeafNode(None, cached_block_html(block, block_type, lines))
+    return block_to_html_node(block, block_type, lines)
+
+def _unique_slug(text, slugs):
+    base = SLUG_RE.sub("-", text.lower()).strip("-") or "section"
+    slug = base
+    count = 1
+    while slug in slugs:
+        count += 1
+        slug = f"{base}-{count}"
+    slugs.add(slug)
+    return slug
+
+def _toc_list(entries):
+    # each entry owns the deeper entries that follow it, as a nested list
+    items = []
+    i = 0
+    while i < len(entries):
+        level, text, slug = entries[i]
+        j = i + 1
+        while j < len(entries) and entries[j][0] > level:
+            j += 1
+        children = [LeafNode("a", text, {"href": f"#{slug}"})]
+        if j > i + 1:
+            children.append(_toc_list(entries[i + 1:j]))
+        items.append(ParentNode("li", children))
+        i = j
+    return ParentNode("ul", items)
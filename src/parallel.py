@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.generate_page import render_page, write_page
+from src.block_cache import block_cache
+from src.inline_cache import inline_cache
+from src.minify import minify_stats
+from src.output_writer import output_writer
+from src.profiling import profiler
+from src.search import search_index
+from src.stats import add_all, take_all
+from src.template import load_template
+
+# set once per worker process by _init_worker, so the template is not
+# pickled again with every task
+_worker_template = None
+
+def _init_worker(template, profile, inline_cache_size, block_cache_dir, minify, search):
+    global _worker_template
+    _worker_template = template
+    # a forked worker starts with a copy of whatever the parent recorded so
+    # far (the static stage, for one); only its own records go back
+    take_all()
+    if profile:
+        profiler.enable()
+    inline_cache.enable(inline_cache_size)
+    block_cache.enable(block_cache_dir)
+    minify_stats.enable(minify)
+    search_index.enable(search)
+
+def _render_to_file(page, template):
+    from_path, dest_path = page
+    try:
+        write_page(from_path, dest_path, template)
+    except Exception as e:
+        raise Exception(f"failed to generate page {from_path}: {e}") from e
+    return dest_path
+
+def _worker_render(page):
+    _render_to_file(page, _worker_template)
+    return take_all()
+
+def render_text_in_worker(md_text, dest_path=None, from_path=None):
+    # renders a page from its source text, for callers that do their own I/O
+    return render_page(md_text, _worker_template, dest_path, from_path), take_all()
+
+def start_workers(jobs, template):
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                               initargs=(template, profiler.enabled, inline_cache.maxsize, block_cache.dir_path,
+                                         minify_stats.enabled, search_index.enabled))
+
+def resolve_jobs(jobs):
+    if jobs is None or jobs < 1:
+        return os.cpu_count() or 1
+    return jobs
+
+def generate_pages(pages, template_path, basepath, jobs=1):
+    template = load_template(template_path, basepath)
+    output_writer.prepare(dest_path for _, dest_path in pages)
+
+    jobs = min(resolve_jobs(jobs), len(pages))
+    if jobs <= 1:
+        for page in pages:
+            print(f"Generating page from {page[0]} to {page[1]} using {template_path}")
+            _render_to_file(page, template)
+        return
+
+    # small chunks keep the workers evenly loaded when page sizes vary
+    chunksize = max(1, len(pages) // (jobs * 8))
+    print(f"Generating {len(pages)} pages using {template_path} on {jobs} processes")
+    executor = start_workers(jobs, template)
+    try:
+        # map yields in submission order, so the log and the first reported
+        # failure are the same on every run
+        results = executor.map(_worker_render, pages, chunksize=chunksize)
+        for page, stats in zip(pages, results):
+            print(f"Generated page from {page[0]} to {page[1]}")
+            add_all(stats)
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
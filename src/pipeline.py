@@ -0,0 +1,204 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.generate_page import find_pages, render_page
+from src.output_writer import output_writer
+from src.parallel import render_text_in_worker, resolve_jobs, start_workers
+from src.profiling import profiler
+from src.stats import add_all
+from src.template import load_template
+
+DEFAULT_READ_DEPTH = 16
+DEFAULT_WRITE_DEPTH = 16
+# most pages one stage hands to its executor in a single call
+READ_BATCH = 8
+RENDER_BATCH = 4
+
+# put on a queue after its last item
+_DONE = None
+
+class Stage:
+    """Busy time of one pipeline stage, summed over its concurrent workers.
+
+    Time spent waiting on a queue (for input, or for room in the next
+    stage's queue) does not count as busy.
+    """
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.busy = 0.0
+        self.calls = 0
+
+    async def run(self, func, *args, executor=None):
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            self.busy += time.perf_counter() - started
+
+    def utilization(self, wall_seconds):
+        return self.busy / (wall_seconds * self.workers) if wall_seconds else 0.0
+
+def generate_pages_pipelined(dir_path_content, template_path, dest_dir_path, basepath, jobs=1,
+                             read_depth=DEFAULT_READ_DEPTH, write_depth=DEFAULT_WRITE_DEPTH):
+    """Build every page under dir_path_content with overlapping stages.
+
+    Discovery walks the content tree, a reader prefetches sources, render
+    workers turn them into HTML on an executor (a thread for jobs=1,
+    otherwise worker processes), and a writer flushes the outputs. The
+    queues between the stages hold at most read_depth sources and
+    write_depth rendered pages, so a slow stage holds back the ones
+    before it instead of buffering the whole site.
+    """
+    template = load_template(template_path, basepath)
+    jobs = resolve_jobs(jobs)
+    print(f"Generating pages from {dir_path_content} using {template_path} on a pipeline "
+          f"with {jobs} render {'worker' if jobs == 1 else 'workers'}")
+    if jobs == 1:
+        executor = ThreadPoolExecutor(max_workers=1)
+        render = _render_with(template)
+    else:
+        executor = start_workers(jobs, template)
+        render = render_text_in_worker
+    stages = [Stage("discover"), Stage("read"), Stage("render", jobs), Stage("write")]
+    started = time.perf_counter()
+    try:
+        pages = asyncio.run(_run_pipeline(dir_path_content, dest_dir_path, executor, render, stages,
+                                          jobs, read_depth, write_depth))
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    wall_seconds = time.perf_counter() - started
+    busy = ", ".join(f"{stage.name} {stage.utilization(wall_seconds):.0%}" for stage in stages)
+    print(f"Pipeline: {pages} pages in {wall_seconds:.2f}s, stages busy: {busy}")
+    if profiler.enabled:
+        # reads and writes run on threads beside the event loop, so the
+        # profile takes their time per batch from the stages, not per page
+        profiler.add_stats({"stages": {stage.name: [stage.busy, stage.calls] for stage in stages
+                                   if stage.name in ("read", "write")}, "pages": {}})
+    return stages
+
+def _render_with(template):
+    def render(md_text, dest_path, from_path):
+        return render_page(md_text, template, dest_path, from_path), None
+    return render
+
+async def _run_pipeline(content_dir, dest_dir, executor, render, stages, workers, read_depth, write_depth):
+    # Queue items are single pages, but each stage takes whatever is already
+    # waiting (up to a batch) into one executor call, so the hand-offs
+    # between the event loop and the executors do not dominate small pages.
+    discover, read, render_stage, write = stages
+    sources = asyncio.Queue(read_depth)
+    outputs = asyncio.Queue(write_depth)
+    written = 0
+
+    async def read_all():
+        pages = await discover.run(_discover, content_dir, dest_dir)
+        for start in range(0, len(pages), READ_BATCH):
+            batch = pages[start:start + READ_BATCH]
+            for page, md_text in zip(batch, await _batch_step(batch, read.run(_read_texts, batch))):
+                await sources.put((page, md_text))
+        await sources.put(_DONE)
+
+    async def render_all():
+        while True:
+            batch, done = await _get_batch(sources, RENDER_BATCH)
+            if batch:
+                pages = [page for page, _ in batch]
+                texts = [(md_text, page[1], page[0]) for page, md_text in batch]
+                results = await _batch_step(pages, render_stage.run(_render_batch, render, texts, executor=executor))
+                for page, (html, stats) in zip(pages, results):
+                    if stats is not None:
+                        add_all(stats)
+                    await outputs.put((page, html))
+            if done:
+                # let the other render workers see the end too
+                await sources.put(_DONE)
+                return
+
+    async def render_workers():
+        await asyncio.gather(*(render_all() for _ in range(workers)))
+        await outputs.put(_DONE)
+
+    async def write_all():
+        nonlocal written
+        while True:
+            batch, done = await _get_batch(outputs, write_depth)
+            if batch:
+                await _batch_step([page for page, _ in batch], write.run(_write_pages, batch))
+                for from_path, dest_path in (page for page, _ in batch):
+                    print(f"Generated page from {from_path} to {dest_path}")
+                written += len(batch)
+            if done:
+                return
+
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in (read_all(), render_workers(), write_all())]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return written
+
+async def _get_batch(queue, limit):
+    # waits for one item, then takes up to limit - 1 more that are already
+    # queued; done is True once the end marker was taken
+    item = await queue.get()
+    if item is _DONE:
+        return [], True
+    batch = [item]
+    while len(batch) < limit and not queue.empty():
+        item = queue.get_nowait()
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+async def _batch_step(pages, step):
+    try:
+        return await step
+    except _PageError as e:
+        raise Exception(f"failed to generate page {pages[e.index][0]}: {e.message}") from e
+
+class _PageError(Exception):
+    # the failing item's index and error text; plain args so that it
+    # survives the trip back from a worker process
+    def __init__(self, index, message):
+        super().__init__(index, message)
+        self.index = index
+        self.message = message
+
+def _each(func, items):
+    # applies func to every item, recording which one failed
+    results = []
+    for index, item in enumerate(items):
+        try:
+            results.append(func(item))
+        except Exception as e:
+            raise _PageError(index, str(e)) from e
+    return results
+
+def _discover(content_dir, dest_dir):
+    pages = find_pages(content_dir, dest_dir)
+    output_writer.prepare(dest_path for _, dest_path in pages)
+    return pages
+
+def _read_texts(pages):
+    return _each(lambda page: _read_text(page[0]), pages)
+
+def _render_batch(render, texts):
+    # texts holds (md_text, dest_path, from_path) triples
+    return _each(lambda item: render(*item), texts)
+
+def _write_pages(batch):
+    return _each(lambda item: output_writer.write(item[0][1], item[1]), batch)
+
+def _read_text(path):
+    with open(path, 'r', encoding="utf-8") as file:
+        return file.read()
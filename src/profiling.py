@@ -0,0 +1,117 @@
+from time import perf_counter
+
+from src.stats import register
+
+class TimedWriter:
+    """File proxy that records time spent in write() as the "write" stage."""
+
+    def __init__(self, file, profiler):
+        self.file = file
+        self.profiler = profiler
+
+    def write(self, text):
+        self.profiler.start("write")
+        try:
+            return self.file.write(text)
+        finally:
+            self.profiler.stop()
+
+    def writelines(self, fragments):
+        for fragment in fragments:
+            self.write(fragment)
+
+class Profiler:
+    """Opt-in per-stage and per-page wall time recorder.
+
+    Stages nest: time spent in an inner stage is not counted again for the
+    stage around it, so the stage totals add up to the instrumented time.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.pages = {}
+        self.page = None
+        self._stack = []
+
+    def enable(self):
+        self.enabled = True
+
+    def start(self, name):
+        self._stack.append([name, perf_counter(), 0.0])
+
+    def stop(self):
+        name, started, child_time = self._stack.pop()
+        elapsed = perf_counter() - started
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        self._record(name, elapsed - child_time)
+
+    def _record(self, name, seconds, calls=1):
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += calls
+        if self.page is not None:
+            page = self.pages[self.page]
+            page[name] = page.get(name, 0.0) + seconds
+
+    def timed_iter(self, name, iterable):
+        # each next() on the wrapped iterable counts as one call of the stage
+        iterator = iter(iterable)
+        while True:
+            self.start(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield item
+
+    def begin_page(self, path):
+        self.page = path
+        self.pages[path] = {}
+
+    def end_page(self):
+        self.page = None
+
+    def take_stats(self):
+        data = {"stages": self.stages, "pages": self.pages}
+        self.stages = {}
+        self.pages = {}
+        return data
+
+    def add_stats(self, data):
+        for name, (seconds, calls) in data["stages"].items():
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+        self.pages.update(data["pages"])
+
+    def summary(self, top=10):
+        lines = []
+        total = sum(seconds for seconds, _ in self.stages.values())
+        lines.append(f"{'stage':<16}{'seconds':>10}{'share':>8}{'calls':>10}")
+        for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            share = seconds / total if total else 0.0
+            lines.append(f"{name:<16}{seconds:>10.3f}{share:>8.1%}{calls:>10}")
+        if self.pages:
+            lines.append("")
+            lines.append(f"slowest {min(top, len(self.pages))} of {len(self.pages)} pages:")
+            page_totals = sorted(((sum(stages.values()), path) for path, stages in self.pages.items()), reverse=True)
+            for seconds, path in page_totals[:top]:
+                stages = self.pages[path]
+                slowest_stage = max(stages, key=stages.get) if stages else "-"
+                lines.append(f"{seconds:>10.4f}s  {path}  (mostly {slowest_stage})")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        import json
+        data = {
+            "stages": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.stages.items()},
+            "pages": self.pages,
+        }
+        with open(path, 'w', encoding="utf-8") as file:
+            json.dump(data, file, indent=2, sort_keys=True)
+
+profiler = register("profile", Profiler())
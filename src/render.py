@@ -0,0 +1,26 @@
+from src.markdown_html import iter_markdown_html
+from src.page import Page
+from src.template import LinkRewriter, rewrite_links
+
+# In-process rendering for callers that already hold the markdown, such as a
+# preview service. Nothing here reads or writes files: pass a Template built
+# once with Template(text, basepath) and reuse it for every call. Without a
+# template only the content <div> is produced, with links rewritten for
+# basepath.
+
+def render_markdown(markdown, template=None, basepath="/"):
+    page = Page.from_markdown(markdown)
+    if template is None:
+        return rewrite_links(page.to_html(), basepath)
+    return template.render(page.title, page.to_html())
+
+def write_markdown(out, lines, template=None, basepath="/"):
+    # lines is any iterable of lines, e.g. an open file or sys.stdin; the
+    # HTML is streamed to out
+    if template is None:
+        rewriter = LinkRewriter(out, basepath)
+        rewriter.writelines(iter_markdown_html(lines))
+        rewriter.flush()
+        return
+    page = Page(lines)
+    template.write(out, page.title, page.iter_html())
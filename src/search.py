@@ -0,0 +1,164 @@
+import os
+import re
+from collections import Counter
+
+from src.stats import register
+from src.textnode import TextType
+
+# json and the cache helpers are imported where the index is written: every
+# render imports this module, including the ones that never enable it
+
+SEARCH_VERSION = 1
+SEARCH_DIR = "search"
+PAGES_FILE = "pages.json"
+# terms sharing their first SHARD_PREFIX_LEN characters go to one shard, so
+# a query fetches one small file per term
+SHARD_PREFIX_LEN = 2
+MIN_TERM_LEN = 2
+MAX_TERM_LEN = 40
+
+TERM_RE = re.compile(r"\w+")
+# tags that separate words; inline tags (b, i, a, code, img) do not
+BLOCK_TAG_RE = re.compile(r"</?(?:div|p|h[1-6]|ul|ol|li|blockquote|pre)>")
+# text is not escaped, so a "<" only starts a tag when a name follows it
+TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+
+def terms(text):
+    return [term for term in TERM_RE.findall(text.lower()) if MIN_TERM_LEN <= len(term) <= MAX_TERM_LEN]
+
+def shard_name(term):
+    # prefixes that are not plain ASCII letters and digits are hex encoded,
+    # so shard names are safe in URLs and on every filesystem
+    prefix = term[:SHARD_PREFIX_LEN]
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return "_" + prefix.encode("utf-8").hex()
+
+def page_url(dest_path, public_dir, basepath):
+    rel_path = os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+    return basepath + rel_path.removesuffix("index.html")
+
+class SearchIndex:
+    """Inverted index of page text, collected while pages are rendered.
+
+    The text comes from the text nodes that inline parsing produces anyway,
+    so pages are not parsed again; cached inline and block HTML, which skips
+    the text nodes, is reduced back to the same text by dropping its tags.
+    Each rendered page's term counts are kept until write() merges them
+    with the pages of earlier builds and rewrites the shards that changed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.pages = {}
+        self.current = Counter()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def record(self, text):
+        self.current.update(terms(text))
+
+    def record_nodes(self, text_nodes):
+        # images have no visible text; their alt text is left out, as it is
+        # when recording from HTML
+        self.record("".join(node.text for node in text_nodes if node.text_type != TextType.IMAGE))
+
+    def record_html(self, html):
+        self.record(TAG_RE.sub("", BLOCK_TAG_RE.sub(" ", html)))
+
+    def begin_page(self):
+        self.current = Counter()
+
+    def add_page(self, dest_path, title):
+        self.pages[dest_path] = {"title": title, "terms": dict(self.current)}
+        self.current = Counter()
+
+    def take_stats(self):
+        pages = self.pages
+        self.pages = {}
+        return pages
+
+    def add_stats(self, pages):
+        self.pages.update(pages)
+
+    def write(self, public_dir, basepath, cache_path, dest_paths):
+        """Write the index of the pages in dest_paths under public_dir.
+
+        Pages rendered in this build replace their entries in the cache at
+        cache_path; the others keep the entries of their last build. Only
+        shards whose content changed are rewritten, and any other file in the
+        index directory is removed.
+        """
+        from src.fileutil import load_json, save_json
+        cache = load_json(cache_path, {})
+        if cache.get("version") != SEARCH_VERSION:
+            cache = {}
+        cached_pages = cache.get("pages", {})
+        cached_pages.update(self.take_stats())
+        pages = {dest_path: cached_pages[dest_path] for dest_path in dest_paths if dest_path in cached_pages}
+
+        # ids stay the same across builds, so a changed page only touches
+        # the shards of its own terms
+        ids = {dest_path: page_id for dest_path, page_id in cache.get("ids", {}).items() if dest_path in pages}
+        next_id = max(ids.values(), default=-1) + 1
+        for dest_path in sorted(pages):
+            if dest_path not in ids:
+                ids[dest_path] = next_id
+                next_id += 1
+
+        shards = {}
+        for dest_path, page in pages.items():
+            for term, count in page["terms"].items():
+                shards.setdefault(shard_name(term), {}).setdefault(term, []).append([ids[dest_path], count])
+        for postings in shards.values():
+            for entries in postings.values():
+                entries.sort()
+
+        search_dir = os.path.join(public_dir, SEARCH_DIR)
+        os.makedirs(search_dir, exist_ok=True)
+        page_table = {
+            "shard_prefix_length": SHARD_PREFIX_LEN,
+            "pages": {str(ids[dest_path]): [page_url(dest_path, public_dir, basepath), page["title"]]
+                      for dest_path, page in pages.items()},
+        }
+        written = _write_if_changed(os.path.join(search_dir, PAGES_FILE), page_table)
+        for name, postings in shards.items():
+            written += _write_if_changed(os.path.join(search_dir, f"{name}.json"), postings)
+        # every file not written above is left over from an older index,
+        # whether or not the cache still knows about it
+        produced = {PAGES_FILE} | {f"{name}.json" for name in shards}
+        removed = 0
+        for name in sorted(os.listdir(search_dir)):
+            if name not in produced:
+                os.remove(os.path.join(search_dir, name))
+                removed += 1
+
+        save_json(cache_path, {"version": SEARCH_VERSION, "ids": ids, "pages": pages})
+        print(f"Search index: {len(pages)} pages, {len(shards)} shards, "
+              f"rewrote {written} files, removed {removed} shards")
+        return written, removed
+
+    def indexed_pages(self, cache_path):
+        # pages with an entry in the cache, which incremental builds need
+        # not render again to index
+        from src.fileutil import load_json
+        cache = load_json(cache_path, {})
+        if cache.get("version") != SEARCH_VERSION:
+            return set()
+        return set(cache["pages"])
+
+def _write_if_changed(path, data):
+    import json
+    text = json.dumps(data, separators=(",", ":"), sort_keys=True)
+    if os.path.exists(path):
+        with open(path, 'r', encoding="utf-8") as file:
+            if file.read() == text:
+                return 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+    return 1
+
+search_index = register("search", SearchIndex())
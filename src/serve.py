@@ -0,0 +1,17 @@
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+def make_static_server(public_dir, host, port):
+    server = ThreadingHTTPServer((host, port), partial(SimpleHTTPRequestHandler, directory=public_dir))
+    server.daemon_threads = True
+    return server
+
+def serve(public_dir, host="localhost", port=8888):
+    server = make_static_server(public_dir, host, port)
+    print(f"Serving {public_dir} at http://{host}:{port}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,39 @@
+# Build features keep their counters and records in one object per process.
+# Worker processes collect their own and send them back with every result,
+# and the parent adds them to its own. Each feature registers its object here
+# under a name; the object provides take_stats(), which returns what it has
+# recorded and starts over, and add_stats(), which adds what another process
+# took.
+
+_registered = {}
+
+class Counters:
+    """take_stats() and add_stats() for objects that only count.
+
+    COUNTERS names the numeric attributes, which the subclass sets up in
+    its __init__; the stats are a tuple of them in that order.
+    """
+
+    COUNTERS = ()
+
+    def take_stats(self):
+        stats = tuple(getattr(self, name) for name in self.COUNTERS)
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        return stats
+
+    def add_stats(self, stats):
+        for name, value in zip(self.COUNTERS, stats):
+            setattr(self, name, getattr(self, name) + value)
+
+def register(name, obj):
+    # obj is shared by every page rendered in this process
+    _registered[name] = obj
+    return obj
+
+def take_all():
+    return {name: obj.take_stats() for name, obj in _registered.items()}
+
+def add_all(stats):
+    for name, taken in stats.items():
+        _registered[name].add_stats(taken)
@@ -0,0 +1,155 @@
+# src.minify is imported by the templates that minify; render-one and the
+# builds without --minify never load it
+
+TITLE_SLOT = "{{ Title }}"
+CONTENT_SLOT = "{{ Content }}"
+LINK_PATTERNS = ('src="/', 'href="/')
+
+def rewrite_links(html, basepath):
+    html = html.replace('src="/', f'src="{basepath}')
+    html = html.replace('href="/', f'href="{basepath}')
+    return html
+
+# characters a fragment can end with while holding back the start of a link pattern
+_PATTERN_CHARS = frozenset("".join(pattern[:-1] for pattern in LINK_PATTERNS))
+
+def _pattern_prefix_len(text):
+    if not text or text[-1] not in _PATTERN_CHARS:
+        return 0
+    for length in range(min(len(text), max(map(len, LINK_PATTERNS)) - 1), 0, -1):
+        tail = text[-length:]
+        if any(pattern.startswith(tail) for pattern in LINK_PATTERNS):
+            return length
+    return 0
+
+class LinkRewriter:
+    """Applies rewrite_links to a stream of fragments written to file.
+
+    A fragment tail that could be the start of a link pattern is held back
+    until the next write, so the result matches rewriting the joined text.
+    """
+
+    def __init__(self, file, basepath):
+        self.file = file
+        self.basepath = basepath
+        self.pending = ""
+
+    def write(self, text):
+        text = self.pending + text
+        keep = _pattern_prefix_len(text)
+        if keep:
+            self.pending = text[-keep:]
+            text = text[:-keep]
+        else:
+            self.pending = ""
+        self.file.write(rewrite_links(text, self.basepath))
+
+    def writelines(self, fragments):
+        for fragment in fragments:
+            self.write(fragment)
+
+    def flush(self):
+        self.file.write(self.pending)
+        self.pending = ""
+
+def _may_straddle(left, right, patterns):
+    # True if a pattern could be completed by a value placed between left
+    # and right, which a per-segment rewrite would then miss
+    for pattern in patterns:
+        for i in range(1, len(pattern)):
+            if left.endswith(pattern[:i]) or right.startswith(pattern[i:]):
+                return True
+    return False
+
+class Template:
+    def __init__(self, text, basepath, minify=False):
+        # a minified template is minified here, once, and only the content
+        # of each page is minified as it is rendered
+        self.minify = minify
+        self.saved = 0
+        if minify:
+            from src.minify import minify_html
+            minified = minify_html(text)
+            self.saved = len(text.encode("utf-8")) - len(minified.encode("utf-8"))
+            text = minified
+        self.text = text
+        self.basepath = basepath
+        # segments[i] is followed by slots[i]; the last segment has no slot
+        self.segments = []
+        self.slots = []
+        for i, title_part in enumerate(text.split(TITLE_SLOT)):
+            if i > 0:
+                self.slots.append(TITLE_SLOT)
+            for j, part in enumerate(title_part.split(CONTENT_SLOT)):
+                if j > 0:
+                    self.slots.append(CONTENT_SLOT)
+                self.segments.append(part)
+        self.exact = '"' not in basepath and not any(
+            _may_straddle(left, right, LINK_PATTERNS + (TITLE_SLOT, CONTENT_SLOT))
+            for left, right in zip(self.segments, self.segments[1:])
+        )
+        self.segments = [rewrite_links(segment, basepath) for segment in self.segments]
+
+    def render(self, title, content):
+        if self.minify:
+            from src.minify import HtmlMinifier, minify_stats
+            minifier = HtmlMinifier()
+            content = minifier.feed(content) + minifier.end()
+            minify_stats.add_page(self.saved + minifier.saved)
+        return self._fill(title, content)
+
+    def _fill(self, title, content):
+        # places content that is already minified, if the template minifies
+        if not self.exact or CONTENT_SLOT in title:
+            return self._render_by_replace(title, content)
+        values = {
+            TITLE_SLOT: rewrite_links(title, self.basepath),
+            CONTENT_SLOT: rewrite_links(content, self.basepath),
+        }
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def write(self, file, title, fragments):
+        """Stream the page to file, taking the content as markup fragments."""
+        if self.minify:
+            from src.minify import HtmlMinifier, minify_stats
+            minifier = HtmlMinifier()
+            self._write(file, title, minifier.stream(fragments))
+            minify_stats.add_page(self.saved + minifier.saved)
+            return
+        self._write(file, title, fragments)
+
+    def _write(self, file, title, fragments):
+        if not self.exact or CONTENT_SLOT in title or self.slots.count(CONTENT_SLOT) > 1:
+            file.write(self._fill(title, "".join(fragments)))
+            return
+        title = rewrite_links(title, self.basepath)
+        file.write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            if slot == TITLE_SLOT:
+                file.write(title)
+            else:
+                rewriter = LinkRewriter(file, self.basepath)
+                rewriter.writelines(fragments)
+                rewriter.flush()
+            file.write(segment)
+
+    def _render_by_replace(self, title, content):
+        html = self.text.replace(TITLE_SLOT, title)
+        html = html.replace(CONTENT_SLOT, content)
+        return rewrite_links(html, self.basepath)
+
+    def __repr__(self):
+        return f"Template({len(self.segments)} segments, {self.slots}, {self.basepath})"
+
+def load_template(template_path, basepath, minify=None):
+    # minification is a build-wide switch, like the caches; pass minify to
+    # decide here instead
+    if minify is None:
+        from src.minify import minify_stats
+        minify = minify_stats.enabled
+    with open(template_path, 'r', encoding="utf-8") as file:
+        return Template(file.read(), basepath, minify)
@@ -0,0 +1,233 @@
+import os
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from src.copy_static import sync_files_recursive
+from src.fileutil import remove_output
+from src.generate_page import find_pages, write_page
+from src.output_writer import output_writer
+from src.template import load_template
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + RELOAD_PATH + "\")"
+    ".addEventListener(\"reload\", function () { location.reload(); });</script>"
+)
+
+def snapshot(dir_path):
+    # path -> (mtime_ns, size) for every file below dir_path
+    files = {}
+    stack = [dir_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                else:
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+class LiveReload:
+    """Build counter that browser connections wait on."""
+
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+class SiteWatcher:
+    """Keeps the compiled template and source state of a site in memory and
+    re-renders only what changed between two polls."""
+
+    def __init__(self, content_dir, static_dir, template_path, public_dir, basepath,
+                 static_manifest_path, page_manifest_path=None):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.public_dir = public_dir
+        self.basepath = basepath
+        self.static_manifest_path = static_manifest_path
+        self.page_manifest_path = page_manifest_path
+        self.template = None
+        self.template_state = None
+        self.content_state = {}
+        self.static_state = {}
+        self.pages = {}
+        # sources whose last render failed or never ran; retried with the
+        # next change, since their output is older than their inputs
+        self.pending = set()
+
+    def build(self):
+        # pages are rewritten behind the incremental manifest's back, so the
+        # next --incremental build must not trust it
+        if self.page_manifest_path and os.path.exists(self.page_manifest_path):
+            os.remove(self.page_manifest_path)
+        self.template_state = os.stat(self.template_path).st_mtime_ns
+        self.template = load_template(self.template_path, self.basepath)
+        self.static_state = snapshot(self.static_dir)
+        sync_files_recursive(self.static_dir, self.public_dir, self.static_manifest_path)
+        self.content_state = snapshot(self.content_dir)
+        self.pages = dict(find_pages(self.content_dir, self.public_dir))
+        self.render(sorted(self.pages))
+
+    def render(self, sources):
+        # one broken page does not stop the others from rendering
+        self.pending.update(sources)
+        output_writer.prepare(self.pages[from_path] for from_path in sources)
+        failures = []
+        for from_path in sources:
+            try:
+                write_page(from_path, self.pages[from_path], self.template)
+            except Exception as e:
+                failures.append(f"{from_path}: {e}")
+                continue
+            self.pending.discard(from_path)
+        if failures:
+            raise Exception("; ".join(failures))
+
+    def poll(self):
+        """Apply changes since the last poll and return a short description,
+        or None if nothing changed."""
+        # each state is saved only once the work it triggers succeeded, so
+        # a failed step is tried again on the next poll
+        changes = []
+        template_state = os.stat(self.template_path).st_mtime_ns
+        if template_state != self.template_state:
+            self.template = load_template(self.template_path, self.basepath)
+            self.template_state = template_state
+            changes.append("template")
+
+        static_state = snapshot(self.static_dir)
+        if static_state != self.static_state:
+            sync_files_recursive(self.static_dir, self.public_dir, self.static_manifest_path)
+            self.static_state = static_state
+            changes.append("static")
+
+        content_state = snapshot(self.content_dir)
+        if content_state != self.content_state or "template" in changes:
+            pages = dict(find_pages(self.content_dir, self.public_dir))
+            for from_path in sorted(set(self.pages) - set(pages)):
+                if os.path.exists(self.pages[from_path]):
+                    remove_output(self.pages[from_path], self.public_dir)
+                changes.append(f"removed {from_path}")
+            if "template" in changes:
+                stale = sorted(pages)
+            else:
+                stale = sorted(path for path in pages
+                               if content_state.get(path) != self.content_state.get(path))
+            self.pages = pages
+            self.content_state = content_state
+            self.pending.intersection_update(pages)
+            changes.extend(stale)
+            self.render(sorted(self.pending.union(stale)))
+        return ", ".join(changes) if changes else None
+
+    def run(self, reload, interval, stop_event):
+        while not stop_event.wait(interval):
+            started = time.perf_counter()
+            try:
+                changed = self.poll()
+            except Exception as e:
+                print(f"Build failed: {e}", file=sys.stderr)
+                continue
+            if changed:
+                print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms: {changed}")
+                reload.notify()
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """Serves the output directory, adds the reload script to HTML pages and
+    streams reload events to the browser."""
+
+    reload = None
+
+    def do_GET(self):
+        url_path = urlsplit(self.path).path
+        if url_path == RELOAD_PATH:
+            self.send_events()
+            return
+        path = self.translate_path(url_path)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if url_path.endswith(("/", ".html")) and os.path.isfile(path) and path.endswith(".html"):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, 'rb') as file:
+            body = file.read()
+        marker = body.rfind(b"</body>")
+        script = RELOAD_SCRIPT.encode("utf-8")
+        body = body[:marker] + script + body[marker:] if marker != -1 else body + script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        version = self.reload.version
+        try:
+            while True:
+                new_version = self.reload.wait(version, timeout=15)
+                if new_version != version:
+                    version = new_version
+                    self.wfile.write(b"event: reload\ndata: reload\n\n")
+                else:
+                    # keeps proxies and the browser from dropping the stream
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(public_dir, reload, host, port):
+    handler = type("Handler", (DevRequestHandler,), {"reload": reload})
+    server = ThreadingHTTPServer((host, port), partial(handler, directory=public_dir))
+    server.daemon_threads = True
+    return server
+
+def watch(watcher, host="localhost", port=8888, interval=0.2):
+    watcher.build()
+    reload = LiveReload()
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(reload, interval, stop_event), daemon=True)
+    thread.start()
+    server = make_server(watcher.public_dir, reload, host, port)
+    print(f"Serving {watcher.public_dir} at http://{host}:{port}/ and watching for changes (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
+
+def main():
+    # "python3 -m src.watch [options]" is "python3 -m src.main watch [options]"
+    from src.main import main as cli_main
+    cli_main(["watch", *sys.argv[1:]])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+class TempSiteTestCase(unittest.TestCase):
+    """Test case with a fresh temporary directory for the site under test.
+
+    The directory is self.root and is removed after each test. Subclasses
+    that override setUp call super().setUp() first.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def write(self, path, text, mtime_ns=None):
+        # creates the parent directories; mtime_ns pins the modification
+        # time, for tests that must not depend on the clock's resolution
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding="utf-8") as file:
+            file.write(text)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def read(self, *parts):
+        # parts are joined under self.root, so an absolute path works too
+        with open(self.path(*parts), 'r', encoding="utf-8") as file:
+            return file.read()
@@ -0,0 +1,76 @@
+import io
+import os
+import unittest
+
+from src.block_cache import block_cache
+from src.markdown_blocks import BlockType
+from src.markdown_html import iter_markdown_html, markdown_to_html_node
+from tempsite import TempSiteTestCase
+
+MD = "# Title\n\nFirst **paragraph** with [a link](/x)\n\n- one\n- _two_\n\n```\ncode\n```"
+
+class TestBlockCache(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.expected = markdown_to_html_node(MD).to_html()
+        block_cache.enable(self.root)
+
+    def tearDown(self):
+        block_cache.enable(None)
+        block_cache.take_stats()
+
+    def render(self, markdown, dest_path="index.html"):
+        block_cache.begin_page(dest_path)
+        html = markdown_to_html_node(markdown).to_html()
+        block_cache.end_page()
+        return html
+
+    def store_names(self):
+        return sorted(os.listdir(self.root))
+
+    def test_second_render_hits(self):
+        self.assertEqual(self.render(MD), self.expected)
+        self.assertEqual(block_cache.take_stats(), (0, 4))
+        self.assertEqual(self.render(MD), self.expected)
+        block_cache.begin_page("index.html")
+        self.assertEqual("".join(iter_markdown_html(io.StringIO(MD))), self.expected)
+        block_cache.end_page()
+        self.assertEqual(block_cache.take_stats(), (8, 0))
+
+    def test_only_edited_block_misses(self):
+        self.render(MD)
+        block_cache.take_stats()
+        html = self.render(MD.replace("First", "Edited"))
+        self.assertIn("<p>Edited <b>paragraph</b>", html)
+        self.assertEqual(block_cache.take_stats(), (3, 1))
+
+    def test_edit_drops_the_old_block(self):
+        self.render(MD)
+        self.render(MD.replace("First", "Edited"))
+        block_cache.take_stats()
+        self.render(MD)
+        self.assertEqual(block_cache.take_stats(), (3, 1))
+
+    def test_one_store_per_page(self):
+        self.render(MD, "a.html")
+        self.render(MD, "b.html")
+        self.assertEqual(len(self.store_names()), 2)
+        # an unchanged page reads its store and does not write it again
+        store = block_cache.store_for("a.html")
+        os.utime(store, ns=(0, 0))
+        self.render(MD, "a.html")
+        self.assertEqual(os.stat(store).st_mtime_ns, 0)
+
+    def test_prune_removes_stores_of_removed_pages(self):
+        self.render(MD, "a.html")
+        self.render(MD, "b.html")
+        os.makedirs(os.path.join(self.root, "ab"))
+        self.assertEqual(block_cache.prune(["a.html"]), 2)
+        self.assertEqual(self.store_names(), [os.path.basename(block_cache.store_for("a.html"))])
+
+    def test_block_type_is_part_of_key(self):
+        self.assertNotEqual(block_cache.key_for("# x", BlockType.HEADING),
+                            block_cache.key_for("# x", BlockType.PARAGRAPH))
+
+if __name__ == "__main__":
+    unittest.main()
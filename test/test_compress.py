@@ -0,0 +1,106 @@
+import gzip
+import io
+import os
+import shutil
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from src import compress
+from src.compress import SiblingCompressor, remove_siblings
+from tempsite import TempSiteTestCase
+
+class TestSiblingCompressor(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.root, "docs")
+        self.cache = os.path.join(self.root, ".cache")
+        os.makedirs(os.path.join(self.public, "blog"))
+        self.compressor = SiblingCompressor(os.path.join(self.cache, "compress.json"),
+                                            os.path.join(self.cache, "compressed"), ["gz"])
+
+    def write_public(self, rel_path, text):
+        self.write(os.path.join(self.public, rel_path), text)
+
+    def run_compressor(self, min_size=100):
+        with redirect_stdout(io.StringIO()):
+            return self.compressor.run(self.public, min_size, jobs=2)
+
+    def test_writes_gzip_siblings_of_text_files(self):
+        self.write_public("index.html", "<p>hello</p>" * 50)
+        self.write_public("blog/style.css", "p { color: red; }" * 50)
+        self.write_public("image.png", "x" * 500)
+        self.write_public("small.html", "<p>hi</p>")
+        counts = self.run_compressor()
+        self.assertEqual(counts["compressed"], 2)
+        self.assertEqual(counts["too small"], 1)
+        with open(os.path.join(self.public, "index.html.gz"), 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), ("<p>hello</p>" * 50).encode("utf-8"))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "style.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "image.png.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "small.html.gz")))
+
+    def test_unchanged_files_are_not_compressed_again(self):
+        self.write_public("index.html", "<p>hello</p>" * 50)
+        self.write_public("about.html", "<p>about</p>" * 50)
+        self.run_compressor()
+        self.write_public("about.html", "<p>changed</p>" * 50)
+        with mock.patch.object(compress, "compress_data", wraps=compress.compress_data) as compress_data:
+            counts = self.run_compressor()
+        self.assertEqual(compress_data.call_count, 1)
+        self.assertEqual(counts["unchanged"], 1)
+        self.assertEqual(counts["compressed"], 1)
+        with open(os.path.join(self.public, "about.html.gz"), 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), ("<p>changed</p>" * 50).encode("utf-8"))
+
+    def test_full_rebuild_reuses_cached_compression(self):
+        self.write_public("index.html", "<p>hello</p>" * 50)
+        self.run_compressor()
+        shutil.rmtree(self.public)
+        os.makedirs(self.public)
+        self.write_public("index.html", "<p>hello</p>" * 50)
+        with mock.patch.object(compress, "compress_data") as compress_data:
+            counts = self.run_compressor()
+        compress_data.assert_not_called()
+        self.assertEqual(counts["reused"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html.gz")))
+
+    def test_identical_files_compress_once(self):
+        for i in range(200):
+            self.write_public(f"copy{i}.css", "p { color: red; }" * 5000)
+        with mock.patch.object(compress, "compress_data", wraps=compress.compress_data) as compress_data:
+            with redirect_stdout(io.StringIO()):
+                counts = self.compressor.run(self.public, 100, jobs=16)
+        self.assertEqual(compress_data.call_count, 1)
+        self.assertEqual((counts["compressed"], counts["reused"]), (1, 199))
+        for i in range(200):
+            with open(os.path.join(self.public, f"copy{i}.css.gz"), 'rb') as file:
+                self.assertEqual(gzip.decompress(file.read()), ("p { color: red; }" * 5000).encode("utf-8"))
+
+    def test_removed_files_lose_their_siblings(self):
+        self.write_public("index.html", "<p>hello</p>" * 50)
+        self.write_public("old.html", "<p>old</p>" * 50)
+        self.write_public("archive.json.gz", "not ours")
+        self.run_compressor()
+        os.remove(os.path.join(self.public, "old.html"))
+        counts = self.run_compressor()
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "old.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "archive.json.gz")))
+        self.assertEqual(len(os.listdir(os.path.join(self.cache, "compressed"))), 1)
+
+    def test_remove_siblings(self):
+        self.write_public("index.html", "<p>hello</p>" * 50)
+        self.write_public("archive.json.gz", "not ours")
+        self.run_compressor()
+        self.assertEqual(remove_siblings(self.compressor.manifest_path), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "archive.json.gz")))
+        self.assertFalse(os.path.exists(self.compressor.manifest_path))
+
+    def test_gzip_output_is_deterministic(self):
+        data = b"<p>hello</p>" * 50
+        self.assertEqual(compress.compress_data(data, "gz"), compress.compress_data(data, "gz"))
+
+if __name__ == "__main__":
+    unittest.main()
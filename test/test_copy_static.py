@@ -0,0 +1,105 @@
+import os
+import shutil
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.copy_static import copy_file_data, copy_files_recursive, sync_files_recursive
+from tempsite import TempSiteTestCase
+
+class TestSyncStatic(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.manifest = os.path.join(self.root, ".cache", "static.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def sync(self, **kwargs):
+        with redirect_stdout(StringIO()):
+            return sync_files_recursive(self.static, self.docs, self.manifest, **kwargs)
+
+    def test_copies_only_changed_files(self):
+        self.assertEqual(self.sync()["copy"], 2)
+        self.assertEqual(self.sync()["unchanged"], 2)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        counts = self.sync()
+        self.assertEqual((counts["copy"], counts["unchanged"]), (1, 1))
+        with open(os.path.join(self.docs, "index.css"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "body { margin: 0 }")
+
+    def test_hash_mode_skips_touched_files(self):
+        self.sync()
+        css = os.path.join(self.static, "index.css")
+        os.utime(css, ns=(0, 0))
+        self.assertEqual(self.sync(use_hash=True)["copy"], 0)
+        self.assertEqual(os.stat(os.path.join(self.docs, "index.css")).st_mtime_ns, 0)
+
+    def test_removes_only_synced_outputs(self):
+        self.sync()
+        self.write(os.path.join(self.docs, "index.html"), "page")
+        shutil.rmtree(os.path.join(self.static, "images"))
+        self.assertEqual(self.sync()["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_removed_asset_takes_its_compressed_siblings(self):
+        self.write(os.path.join(self.static, "data.json"), "{}")
+        self.write(os.path.join(self.static, "data.json.br"), "static brotli")
+        self.sync()
+        self.write(os.path.join(self.docs, "index.css.gz"), "gzip")
+        os.remove(os.path.join(self.static, "index.css"))
+        os.remove(os.path.join(self.static, "data.json"))
+        self.assertEqual(self.sync()["removed"], 2)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css.gz")))
+        # a sibling that is an asset of its own is placed again
+        with open(os.path.join(self.docs, "data.json.br"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "static brotli")
+
+    def test_hardlink_mode(self):
+        self.sync(link_mode="hardlink")
+        self.assertTrue(os.path.samefile(os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")))
+        self.assertEqual(self.sync(link_mode="hardlink")["unchanged"], 2)
+
+    def test_copy_over_hardlink_leaves_source_alone(self):
+        self.sync(link_mode="hardlink")
+        dest = os.path.join(self.docs, "index.css")
+        os.remove(dest)
+        os.link(os.path.join(self.static, "images", "a.png"), dest)
+        self.sync()
+        with open(os.path.join(self.static, "images", "a.png"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "png")
+        with open(dest, encoding="utf-8") as file:
+            self.assertEqual(file.read(), "body {}")
+
+class TestCopyEngine(TempSiteTestCase):
+    def test_copy_file_data(self):
+        source = os.path.join(self.root, "big.bin")
+        data = os.urandom(3 * 2**20 + 17)
+        with open(source, 'wb') as file:
+            file.write(data)
+        dest = os.path.join(self.root, "copy.bin")
+        with open(dest, 'wb') as file:
+            file.write(b"old contents that are longer" * 10**5)
+        copy_file_data(source, dest)
+        with open(dest, 'rb') as file:
+            self.assertEqual(file.read(), data)
+
+    def test_concurrent_copy_tree(self):
+        static = os.path.join(self.root, "static")
+        for i in range(40):
+            path = os.path.join(static, f"d{i % 4}", f"f{i}.txt")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding="utf-8") as file:
+                file.write(f"file {i}")
+        with open(os.path.join(static, "empty.txt"), 'w', encoding="utf-8"):
+            pass
+        docs = os.path.join(self.root, "docs")
+        out = StringIO()
+        with redirect_stdout(out):
+            counts = copy_files_recursive(static, docs, jobs=8)
+        self.assertEqual(counts["copy"], 41)
+        self.assertIn("files/s", out.getvalue())
+        with open(os.path.join(docs, "d3", "f39.txt"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "file 39")
+        self.assertEqual(os.path.getsize(os.path.join(docs, "empty.txt")), 0)
@@ -1,5 +1,6 @@
 import unittest
-from src.htmlnode import HTMLNode, LeafNode, ParentNode
+from io import StringIO
+from src.htmlnode import HTMLNode, LeafNode, ParentNode, iter_html, write_html
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -94,4 +95,33 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(
             node.to_html(),
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
-        )
\ No newline at end of file
+        )
+
+class TestSerializer(unittest.TestCase):
+    def test_write_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "a "), LeafNode("a", "link", {"href": "/x"})]),
+            ParentNode("ul", [ParentNode("li", [LeafNode("img", "", {"src": "/i.png", "alt": "i"})])]),
+            ParentNode("span", [], {"class": "empty"}),
+        ])
+        out = StringIO()
+        write_html(node, out)
+        self.assertEqual(
+            out.getvalue(),
+            '<div><p>a <a href="/x">link</a></p><ul><li><img src="/i.png" alt="i" /></li></ul><span class="empty"></span></div>',
+        )
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_deep_tree_does_not_recurse(self):
+        node = LeafNode("b", "x")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = "".join(iter_html(node))
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + len("<b>x</b>"))
+
+    def test_nested_error(self):
+        node = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
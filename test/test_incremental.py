@@ -0,0 +1,136 @@
+import os
+import shutil
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.generate_page import generate_page_recursive
+from src.depgraph import DependencyGraph
+from src.incremental import generate_pages_incremental
+from src.minify import minify_stats
+from tempsite import TempSiteTestCase
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css" /><body>{{ Content }}</body></html>'
+
+class TestIncremental(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.static = os.path.join(self.root, "static")
+        self.manifest = os.path.join(self.root, ".cache", "manifest.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "cat.png"), "png")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[blog](/blog)")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nSome **text**")
+
+    def build(self, basepath="/", explain=False):
+        out = StringIO()
+        with redirect_stdout(out):
+            generate_pages_incremental(self.content, self.template, self.docs, basepath, self.manifest,
+                                       static_dir=self.static, explain=explain)
+        return out.getvalue()
+
+    def test_first_build_matches_full_build(self):
+        self.build("/site/")
+        clean = os.path.join(self.root, "clean")
+        os.makedirs(clean)
+        with redirect_stdout(StringIO()):
+            generate_page_recursive(self.content, self.template, clean, "/site/")
+        for rel in ["index.html", os.path.join("blog", "post", "index.html")]:
+            self.assertEqual(self.read(os.path.join(self.docs, rel)), self.read(os.path.join(clean, rel)))
+
+    def test_unchanged_build_renders_nothing(self):
+        self.build()
+        output = self.build()
+        self.assertIn("Rebuilt 0 of 2 pages", output)
+        self.assertNotIn("Generating page", output)
+
+    def test_only_changed_page_is_rebuilt(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        output = self.build()
+        self.assertIn("Rebuilt 1 of 2 pages", output)
+        self.assertIn("<p>changed</p>", self.read(os.path.join(self.docs, "index.html")))
+
+    def test_template_and_basepath_changes_rebuild_everything(self):
+        self.build()
+        self.write(self.template, TEMPLATE + "\n")
+        self.assertIn("Rebuilt 2 of 2 pages", self.build())
+        self.assertIn("Rebuilt 2 of 2 pages", self.build("/other/"))
+        self.assertIn('href="/other/blog"', self.read(os.path.join(self.docs, "index.html")))
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        self.assertIn("Rebuilt 1 of 2 pages", self.build())
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        output = self.build()
+        self.assertIn("removed 1 stale pages", output)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertEqual(list(DependencyGraph.load(self.manifest).pages), [os.path.join(self.docs, "index.html")])
+
+    def test_removed_source_without_manifest_deletes_output(self):
+        # a build that left no manifest behind still leaves its pages
+        with redirect_stdout(StringIO()):
+            generate_page_recursive(self.content, self.template, self.docs, "/")
+        self.write(os.path.join(self.static, "about.html"), "static page")
+        self.write(os.path.join(self.docs, "about.html"), "static page")
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        output = self.build(explain=True)
+        self.assertIn("removed 1 stale pages", output)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "about.html")))
+
+    def test_removed_source_deletes_compressed_siblings(self):
+        self.build()
+        post = os.path.join(self.docs, "blog", "post", "index.html")
+        self.write(post + ".gz", "gzip")
+        self.write(post + ".br", "brotli")
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_asset_change_rebuilds_only_pages_referencing_it(self):
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n![cat](/images/cat.png)")
+        self.build()
+        os.utime(os.path.join(self.static, "images", "cat.png"), ns=(0, 0))
+        output = self.build(explain=True)
+        self.assertIn("Rebuilt 1 of 2 pages", output)
+        self.assertIn("asset:" + os.path.join(self.static, "images/cat.png") + " changed", output)
+
+    def test_template_asset_is_a_dependency_of_every_page(self):
+        self.build()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        self.assertIn("Rebuilt 2 of 2 pages", self.build())
+
+    def test_links_to_pages_are_not_asset_dependencies(self):
+        self.build()
+        graph = DependencyGraph.load(self.manifest)
+        deps = graph.pages[os.path.join(self.docs, "index.html")]["deps"]
+        self.assertEqual([dep for dep in deps if dep.startswith("asset:")],
+                         ["asset:" + os.path.join(self.static, "index.css")])
+
+    def test_explain_names_changed_inputs(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        output = self.build("/other/", explain=True)
+        index = os.path.join(self.docs, "index.html")
+        source = os.path.join(self.content, "index.md")
+        self.assertIn(f"Rebuilding {index}: source:{source} changed; basepath changed", output)
+
+    def test_toggling_minify_rebuilds_everything(self):
+        self.build()
+        minify_stats.enable(True)
+        try:
+            output = self.build(explain=True)
+        finally:
+            minify_stats.enable(False)
+            minify_stats.take_stats()
+        self.assertIn("Rebuilt 2 of 2 pages", output)
+        self.assertIn("minify added", output)
+        self.assertIn("Rebuilt 2 of 2 pages", self.build())
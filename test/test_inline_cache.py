@@ -0,0 +1,35 @@
+import unittest
+
+from src.inline_cache import InlineCache, inline_cache
+from src.markdown_html import markdown_to_html_node
+
+class TestInlineCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = InlineCache()
+        cache.enable(2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        self.assertEqual(cache.get("a"), "A")
+        cache.put("c", "C")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertEqual(cache.take_stats(), (2, 1))
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_disabled_by_default(self):
+        self.assertFalse(InlineCache().enabled)
+
+class TestCachedRendering(unittest.TestCase):
+    def tearDown(self):
+        inline_cache.enable(0)
+        inline_cache.take_stats()
+
+    def test_same_markup_with_cache(self):
+        md = "Read more [here](/blog) and **now**\n\n- Read more [here](/blog) and **now**\n- x\n\n> Read more [here](/blog) and **now**"
+        expected = markdown_to_html_node(md).to_html()
+        inline_cache.enable(100)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(inline_cache.misses, 2)
+        self.assertEqual(inline_cache.hits, 6)
@@ -1,9 +1,12 @@
+import random
 import unittest
 from src.inline_markdown import (
     split_nodes_delimiter, 
     extract_markdown_images, 
     extract_markdown_links, 
+    extract_markdown_spans,
     split_nodes_image,
+    split_nodes_images_and_links,
     split_nodes_link,
     text_to_textnodes
 )
@@ -246,6 +249,22 @@ class TestMarkdownExtractor(unittest.TestCase):
         self.assertListEqual([("alt", "img.png")], images)
         self.assertListEqual([("text", "url.com")], links)
 
+    def test_extract_markdown_spans(self):
+        text = "an ![img](i.png) and a [link](l.com)"
+        self.assertListEqual(extract_markdown_spans(text), [
+            (3, 16, TextType.IMAGE, "img", "i.png"),
+            (23, 36, TextType.LINK, "link", "l.com"),
+        ])
+        self.assertEqual(text[3:16], "![img](i.png)")
+
+    def test_extract_markdown_spans_image_inside_link_url(self):
+        # images are split out first, so the image wins over the link around it
+        self.assertListEqual(extract_markdown_spans("[a](x![b)](c) [d](e)"), [
+            (5, 13, TextType.IMAGE, "b)", "c"),
+            (14, 20, TextType.LINK, "d", "e"),
+        ])
+
+
 class TestSplitNodesImageLink(unittest.TestCase):
     def test_split_images(self):
         node = TextNode(
@@ -515,6 +534,23 @@ class TestSplitNodesImageLink(unittest.TestCase):
             new_nodes,
         )
     
+    def test_split_link_after_identical_image(self):
+        node = TextNode("![a](b) [a](b)", TextType.TEXT)
+        self.assertListEqual(split_nodes_link([node]), [
+            TextNode("![a](b) ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "b"),
+        ])
+
+    def test_split_images_and_links_matches_two_passes(self):
+        rng = random.Random(7)
+        pieces = ["!", "[", "]", "(", ")", "a", " ", "![", "](", "[x](y)", "![p](q)"]
+        for _ in range(5000):
+            nodes = [TextNode("".join(rng.choice(pieces) for _ in range(rng.randint(0, 12))), TextType.TEXT),
+                     TextNode("b", TextType.BOLD)]
+            self.assertListEqual(split_nodes_images_and_links(nodes),
+                                 split_nodes_link(split_nodes_image(nodes)), nodes[0].text)
+
+
 class TestTextToTextNodes(unittest.TestCase):
     def test_text_to_textnodes(self):
         nodes = text_to_textnodes("This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)")
@@ -578,6 +614,49 @@ class TestTextToTextNodes(unittest.TestCase):
             "plus ![image](img.png) and [multiple](url1.com) [links](url2.com)!"
         )
 
+    def test_text_to_textnodes_precedence(self):
+        self.assertListEqual(text_to_textnodes("**a_b `c**"), [TextNode("a_b `c", TextType.BOLD)])
+        self.assertListEqual(text_to_textnodes("[a_b_](u)"), [
+            TextNode("[a", TextType.TEXT),
+            TextNode("b", TextType.ITALIC),
+            TextNode("](u)", TextType.TEXT),
+        ])
+        with self.assertRaises(Exception) as context:
+            text_to_textnodes("`a _b_")
+        self.assertEqual(str(context.exception), "missing closing delimiter: `")
+        with self.assertRaises(Exception) as context:
+            text_to_textnodes("`a` ` _b")
+        self.assertEqual(str(context.exception), "missing closing delimiter: _")
+
+    def test_text_to_textnodes_matches_multi_pass(self):
+        def multi_pass(text):
+            if not text:
+                return []
+            nodes = [TextNode(text, TextType.TEXT)]
+            nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+            nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+            nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+            nodes = split_nodes_image(nodes)
+            return split_nodes_link(nodes)
+
+        def outcome(func, text):
+            try:
+                return func(text)
+            except Exception as e:
+                return str(e)
+
+        rng = random.Random(5)
+        pieces = ["*", "**", "_", "`", "!", "[", "]", "(", ")", "a", " ", "[x](y)", "![p](q)", "![", "](", "](x!["]
+        for _ in range(20000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 16)))
+            self.assertEqual(outcome(text_to_textnodes, text), outcome(multi_pass, text), text)
+        # long texts, where the cached positions of the next ** and _ are
+        # reused across many tokens
+        pieces = ["`f()` ", "_i_ ", "[a](x![b) ", "![p](q) ", "**b** ", "plain "]
+        for _ in range(200):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(50, 200)))
+            self.assertEqual(outcome(text_to_textnodes, text), outcome(multi_pass, text), text)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
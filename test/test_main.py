@@ -0,0 +1,104 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from src.main import main, parse_args, run_build, run_render_one
+from tempsite import TempSiteTestCase
+
+class TestParseArgs(unittest.TestCase):
+    def test_bare_invocation_builds(self):
+        args = parse_args([])
+        self.assertEqual((args.command, args.basepath, args.run), ("build", "/", run_build))
+
+    def test_basepath_without_subcommand_builds(self):
+        args = parse_args(["/static-site-generator/"])
+        self.assertEqual((args.command, args.basepath), ("build", "/static-site-generator/"))
+        args = parse_args(["--incremental", "-j", "4"])
+        self.assertEqual((args.command, args.incremental, args.jobs), ("build", True, 4))
+
+    def test_subcommands(self):
+        args = parse_args(["render-one", "content/index.md", "--basepath", "/site/"])
+        self.assertEqual((args.run, args.source, args.dest, args.basepath),
+                         (run_render_one, "content/index.md", None, "/site/"))
+        self.assertEqual(parse_args(["serve", "--port", "9000"]).port, 9000)
+        self.assertEqual(parse_args(["watch", "/site/"]).basepath, "/site/")
+
+class TestStartup(unittest.TestCase):
+    def test_import_loads_no_pipeline_modules(self):
+        code = "import sys, src.main; print(sorted(m for m in sys.modules if m.startswith('src.')))"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(out.stdout.strip(), "['src.main']")
+
+class TestRenderOne(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, "index.md")
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.source, 'w', encoding="utf-8") as file:
+            file.write("# Hello\n\n[home](/)")
+        with open(self.template, 'w', encoding="utf-8") as file:
+            file.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_render_to_stdout(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            main(["render-one", self.source, "--template", self.template, "--basepath", "/site/"])
+        self.assertEqual(out.getvalue(), '<title>Hello</title><div><h1>Hello</h1><p><a href="/site/">home</a></p></div>')
+
+    def test_render_from_stdin_without_template(self):
+        out = StringIO()
+        with redirect_stdout(out), mock.patch.object(sys, "stdin", StringIO("[home](/)")):
+            main(["render-one", "-", "--no-template", "--basepath", "/site/"])
+        self.assertEqual(out.getvalue(), '<div><p><a href="/site/">home</a></p></div>')
+
+    def test_render_to_file(self):
+        dest = os.path.join(self.root, "out", "index.html")
+        with redirect_stdout(StringIO()):
+            main(["render-one", self.source, dest, "--template", self.template])
+        with open(dest, 'r', encoding="utf-8") as file:
+            self.assertEqual(file.read(), '<title>Hello</title><div><h1>Hello</h1><p><a href="/">home</a></p></div>')
+
+class TestBuild(TempSiteTestCase):
+    # the build command works on ./content, ./static and ./docs
+    def setUp(self):
+        super().setUp()
+        self.write(self.path("template.html"), "<title>{{ Title }}</title>{{ Content }}")
+        self.write(self.path("static", "index.css"), "body {}")
+        self.write(self.path("content", "index.md"), "# Home")
+        self.write(self.path("content", "contact", "index.md"), "# Contact")
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+
+    def build(self, *argv):
+        out = StringIO()
+        with redirect_stdout(out):
+            main(["build", *argv])
+        return out.getvalue()
+
+    def test_incremental_build_after_full_build_removes_pages(self):
+        self.build()
+        shutil.rmtree(self.path("content", "contact"))
+        self.assertIn("removed 1 stale pages", self.build("--incremental"))
+        self.assertFalse(os.path.exists(self.path("docs", "contact")))
+
+    def test_incremental_build_after_full_build_removes_assets(self):
+        self.write(self.path("static", "new.css"), "p {}")
+        self.build()
+        os.remove(self.path("static", "new.css"))
+        self.build("--incremental")
+        self.assertFalse(os.path.exists(self.path("docs", "new.css")))
+        self.assertTrue(os.path.exists(self.path("docs", "index.css")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,11 @@
 import unittest
+import io
+import random
+import re
 from src.markdown_blocks import (
     markdown_to_blocks,
     block_to_block_type,
+    iter_blocks,
     BlockType
 )
 
@@ -213,5 +217,60 @@ class TestBlockToBlockType(unittest.TestCase):
         block = "This is line 1\nThis is line 2\nThis is line 3"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_matches_independent_scans(self):
+        # the classifier checked each type with its own all() scan before
+        def scanned_block_type(block):
+            lines = block.split("\n")
+            if len(lines) >= 2 and lines[0] == "```" and lines[-1] == "```":
+                return BlockType.CODE
+            if all(line.startswith(">") for line in lines):
+                return BlockType.QUOTE
+            if all(line.startswith("- ") for line in lines):
+                return BlockType.UNORDERED_LIST
+            if all(line.startswith(f"{i+1}. ") for i, line in enumerate(lines)):
+                return BlockType.ORDERED_LIST
+            if re.match(r"#{1,6} ", lines[0]):
+                return BlockType.HEADING
+            return BlockType.PARAGRAPH
+
+        rng = random.Random(5)
+        pieces = ["\n", " ", "> ", ">", "- ", "-", "1. ", "2. ", "3. ", "# ", "#", "```", "a"]
+        for _ in range(20000):
+            block = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+            self.assertEqual(block_to_block_type(block), scanned_block_type(block), block)
+
+class TestIterBlocks(unittest.TestCase):
+    def test_typed_blocks(self):
+        md = "# Title\n\n  para\nline  \n\n\n- a\n- b\n\n```\ncode\n\n```\n"
+        self.assertEqual(list(iter_blocks(md.split("\n"))), [
+            ("# Title", BlockType.HEADING),
+            ("para\nline", BlockType.PARAGRAPH),
+            ("- a\n- b", BlockType.UNORDERED_LIST),
+            ("```\ncode", BlockType.PARAGRAPH),
+            ("```", BlockType.PARAGRAPH),
+        ])
+
+    def test_reads_file_lines(self):
+        md = "> quote\n>\n> more\n\n1. one\n2. two\n"
+        self.assertEqual(list(iter_blocks(io.StringIO(md))), [
+            ("> quote\n>\n> more", BlockType.QUOTE),
+            ("1. one\n2. two", BlockType.ORDERED_LIST),
+        ])
+
+    def test_whitespace_lines_inside_and_around_block(self):
+        md = "  \n- a\n   \n- b\n \t\n\nx"
+        self.assertEqual(list(iter_blocks(md.split("\n"))), [
+            ("- a\n   \n- b", BlockType.PARAGRAPH),
+            ("x", BlockType.PARAGRAPH),
+        ])
+
+    def test_matches_split_and_classify(self):
+        rng = random.Random(3)
+        pieces = ["\n", "\n\n", " ", "\t", "> ", ">", "- ", "-", "1. ", "2. ", "# ", "#", "```", "a", "b c"]
+        for _ in range(20000):
+            md = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 16)))
+            expected = [(block, block_to_block_type(block)) for block in markdown_to_blocks(md)]
+            self.assertEqual(list(iter_blocks(md.split("\n"))), expected, md)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import unittest
-from src.markdown_html import markdown_to_html_node
+import io
+from src.markdown_html import iter_markdown_html, markdown_to_html_node
 class TestMarkdownTranslation(unittest.TestCase):
     def test_paragraphs(self):
         md = """
@@ -112,4 +113,12 @@ this is paragraph text
         self.assertEqual(
             html,
             '<div><blockquote>"I am in fact a Hobbit in all but size."  -- J.R.R. Tolkien</blockquote></div>'
-        )
\ No newline at end of file
+        )
+
+    def test_iter_markdown_html_matches_to_html(self):
+        md = "# Title\n\nSome **bold** [link](/x)\n\n- a\n- _b_\n\n```\ncode\n```\n\n> q\n"
+        self.assertEqual(
+            "".join(iter_markdown_html(io.StringIO(md))),
+            markdown_to_html_node(md).to_html(),
+        )
+
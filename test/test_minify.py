@@ -0,0 +1,95 @@
+import unittest
+from io import StringIO
+
+from src.minify import HtmlMinifier, MinifyStats, minify_html, minify_stats
+from src.template import Template
+
+PAGE = """<!doctype html>
+<html>
+  <head>
+    <!-- page metadata -->
+    <title>  A   title </title>
+  </head>
+  <body>
+    <p>Some   <b>bold</b>
+    text&nbsp; and  more</p>
+    <pre><code>def f():
+    return  1
+</code></pre>
+    <p>inline <code>a  =  b</code> <!--[if IE]>kept<![endif]--> end</p>
+  </body>
+</html>
+"""
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_collapses_whitespace_and_drops_comments(self):
+        self.assertEqual(
+            minify_html(PAGE),
+            "<!doctype html><html><head><title>A title</title></head><body>"
+            "<p>Some <b>bold</b> text&nbsp; and  more</p>"
+            "<pre><code>def f():\n    return  1\n</code></pre>"
+            "<p>inline <code>a  =  b</code> <!--[if IE]>kept<![endif]--> end</p></body></html>",
+        )
+
+    def test_whitespace_between_inline_tags_is_kept(self):
+        self.assertEqual(minify_html("<p><a href='/'>a</a>\n  <b>b</b></p>"), "<p><a href='/'>a</a> <b>b</b></p>")
+
+    def test_comment_between_text_leaves_one_space(self):
+        self.assertEqual(minify_html("<p>a <!-- x > y --> b</p>"), "<p>a b</p>")
+
+    def test_text_that_is_not_a_tag(self):
+        self.assertEqual(minify_html("<p>a  <  b</p>"), "<p>a < b</p>")
+
+    def test_every_split_point(self):
+        expected = minify_html(PAGE)
+        for i in range(len(PAGE)):
+            minifier = HtmlMinifier()
+            self.assertEqual(minifier.feed(PAGE[:i]) + minifier.feed(PAGE[i:]) + minifier.end(), expected, i)
+
+    def test_saved_counts_bytes(self):
+        minifier = HtmlMinifier()
+        html = "".join(minifier.stream(["<p>é  <!-- é -->", " x</p>\n"]))
+        self.assertEqual(html, "<p>é x</p>")
+        self.assertEqual(minifier.saved, len("<p>é  <!-- é --> x</p>\n".encode("utf-8")) - len(html.encode("utf-8")))
+
+class TestMinifiedTemplate(unittest.TestCase):
+    def tearDown(self):
+        minify_stats.take_stats()
+
+    def test_template_is_minified_once(self):
+        text = '<html>\n  <title>{{ Title }}</title>\n  <link href="/index.css" />\n  <article>{{ Content }}</article>\n</html>\n'
+        template = Template(text, "/site/", minify=True)
+        self.assertEqual(template.segments,
+                         ["<html><title>", '</title><link href="/site/index.css" /><article>', "</article></html>"])
+        self.assertEqual(template.saved, 11)
+
+    def test_render_and_write_minify_content(self):
+        template = Template("<title>{{ Title }}</title>\n<body>{{ Content }}</body>", "/", minify=True)
+        content = "<div><p>a\n  b</p>\n<pre>x\n  y</pre></div>"
+        expected = "<title>T</title><body><div><p>a b</p><pre>x\n  y</pre></div></body>"
+        self.assertEqual(template.render("T", content), expected)
+        out = StringIO()
+        template.write(out, "T", [content[:7], content[7:20], content[20:]])
+        self.assertEqual(out.getvalue(), expected)
+        self.assertEqual(minify_stats.take_stats(), (2, 2 * (1 + 2 + 1)))
+
+    def test_inexact_template_counts_the_page_once(self):
+        # the link pattern may straddle the title, so write() falls back to a
+        # whole-page render
+        template = Template('<a href="{{ Title }}">x</a> {{ Content }}', "/b/", True)
+        self.assertFalse(template.exact)
+        out = StringIO()
+        template.write(out, "/t", ["<p>a  <b>b</b></p>"])
+        self.assertEqual(out.getvalue(), '<a href="/b/t">x</a> <p>a <b>b</b></p>')
+        self.assertEqual(minify_stats.take_stats(), (1, 1))
+
+    def test_stats(self):
+        stats = MinifyStats()
+        stats.add_page(100)
+        stats.add_stats((2, 1948))
+        self.assertEqual(stats.summary(), "Minify: saved 2.0 KB across 3 pages")
+        self.assertEqual(stats.take_stats(), (3, 2048))
+        self.assertEqual(stats.take_stats(), (0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
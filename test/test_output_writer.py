@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.output_writer import OutputWriter
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.writer = OutputWriter()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def read(self, path):
+        with open(path, 'r', encoding="utf-8") as file:
+            return file.read()
+
+    def test_prepare_creates_directories(self):
+        paths = [os.path.join(self.root, "a", "b", "index.html"), os.path.join(self.root, "c", "index.html")]
+        self.writer.prepare(paths)
+        self.assertTrue(os.path.isdir(os.path.join(self.root, "a", "b")))
+        self.assertTrue(os.path.isdir(os.path.join(self.root, "c")))
+
+    def test_write_is_utf8(self):
+        path = os.path.join(self.root, "index.html")
+        self.writer.write(path, "<p>café — 日本</p>")
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), "<p>café — 日本</p>".encode("utf-8"))
+        self.assertEqual(self.writer.take_stats(), (1, 0, len("<p>café — 日本</p>".encode("utf-8"))))
+
+    def test_unchanged_output_keeps_mtime(self):
+        path = os.path.join(self.root, "index.html")
+        self.writer.write(path, "<p>same</p>")
+        os.utime(path, ns=(0, 0))
+        self.writer.write(path, "<p>same</p>")
+        self.assertEqual(os.stat(path).st_mtime_ns, 0)
+        self.assertEqual(self.writer.unchanged, 1)
+        self.writer.write(path, "<p>other</p>")
+        self.assertEqual(self.read(path), "<p>other</p>")
+        self.assertNotEqual(os.stat(path).st_mtime_ns, 0)
+        self.assertEqual(self.writer.written, 2)
+        self.assertEqual(os.listdir(self.root), ["index.html"])
+
+    def test_failed_render_leaves_old_output(self):
+        path = os.path.join(self.root, "index.html")
+        self.writer.write(path, "<p>old</p>")
+        with self.assertRaises(ValueError):
+            with self.writer.open(path) as file:
+                file.write("<p>half")
+                raise ValueError("render failed")
+        self.assertEqual(self.read(path), "<p>old</p>")
+        self.assertEqual(os.listdir(self.root), ["index.html"])
+
+    def test_stats_round_trip(self):
+        self.writer.add_stats((2, 3, 100))
+        self.assertEqual(self.writer.summary(), "Output: wrote 2 pages (0.0 MB), skipped 3 unchanged")
+        self.assertEqual(self.writer.take_stats(), (2, 3, 100))
+        self.assertEqual(self.writer.take_stats(), (0, 0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
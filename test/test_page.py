@@ -0,0 +1,87 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from bench.corpus import synthetic_page
+from src import page as page_module
+from src.generate_page import extract_title, write_page
+from src.markdown_blocks import BlockType
+from src.markdown_html import markdown_to_html_node
+from src.page import Page
+from src.template import Template
+
+MARKDOWN = """# The **Title**
+
+Intro
+
+## Setup
+
+### Install `pkg`
+
+## Usage
+
+## Usage
+"""
+
+class TestPage(unittest.TestCase):
+    def test_blocks_title_and_outline(self):
+        page = Page.from_markdown(MARKDOWN)
+        self.assertEqual(page.blocks[:2], [("# The **Title**", BlockType.HEADING), ("Intro", BlockType.PARAGRAPH)])
+        self.assertEqual(page.title, "The **Title**")
+        self.assertEqual(page.outline, [
+            (1, "The Title", "the-title"),
+            (2, "Setup", "setup"),
+            (3, "Install pkg", "install-pkg"),
+            (2, "Usage", "usage"),
+            (2, "Usage", "usage-2"),
+        ])
+
+    def test_html_matches_markdown_to_html_node(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            md = synthetic_page(rng, 30)
+            page = Page.from_markdown(md)
+            self.assertEqual(page.to_html(), markdown_to_html_node(md).to_html())
+            self.assertEqual(page.html_node().to_html(), page.to_html())
+            self.assertEqual(page.title, extract_title(md))
+
+    def test_toc_and_heading_ids(self):
+        page = Page.from_markdown(MARKDOWN)
+        self.assertEqual(page.toc().to_html(),
+                         '<ul><li><a href="#the-title">The Title</a><ul>'
+                         '<li><a href="#setup">Setup</a><ul><li><a href="#install-pkg">Install pkg</a></li></ul></li>'
+                         '<li><a href="#usage">Usage</a></li><li><a href="#usage-2">Usage</a></li></ul></li></ul>')
+        html = page.to_html(heading_ids=True)
+        self.assertIn('<h1 id="the-title">The <b>Title</b></h1>', html)
+        self.assertIn('<h2 id="usage-2">Usage</h2>', html)
+        self.assertIsNone(Page.from_markdown("text").toc())
+
+    def test_missing_title(self):
+        page = Page.from_markdown("## Not a title\n\ntext")
+        with self.assertRaises(Exception) as context:
+            page.title
+        self.assertEqual(str(context.exception), "There is no title found")
+
+class TestWritePageParsesOnce(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_single_block_parse(self):
+        from_path = os.path.join(self.root, "index.md")
+        with open(from_path, 'w', encoding="utf-8") as file:
+            file.write(MARKDOWN)
+        parse = mock.Mock(wraps=page_module.iter_block_lines)
+        with mock.patch.object(page_module, "iter_block_lines", parse):
+            write_page(from_path, os.path.join(self.root, "index.html"), Template("{{ Title }}|{{ Content }}", "/"))
+        self.assertEqual(parse.call_count, 1)
+        with open(os.path.join(self.root, "index.html"), encoding="utf-8") as file:
+            self.assertEqual(file.read(), "The **Title**|" + markdown_to_html_node(MARKDOWN).to_html())
+
+if __name__ == "__main__":
+    unittest.main()
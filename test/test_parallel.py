@@ -0,0 +1,41 @@
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.generate_page import find_pages
+from src.parallel import generate_pages
+from tempsite import TempSiteTestCase
+
+class TestParallel(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        for i in range(12):
+            self.write(os.path.join(self.content, f"post{i}", "index.md"), f"# Post {i}\n\n- item _{i}_")
+
+    def build(self, dest, jobs):
+        pages = find_pages(self.content, dest)
+        with redirect_stdout(StringIO()):
+            generate_pages(pages, self.template, "/base/", jobs)
+        outputs = {}
+        for _, dest_path in pages:
+            with open(dest_path, 'r', encoding="utf-8") as file:
+                outputs[os.path.relpath(dest_path, dest)] = file.read()
+        return outputs
+
+    def test_parallel_matches_sequential(self):
+        sequential = self.build(os.path.join(self.root, "seq"), 1)
+        parallel = self.build(os.path.join(self.root, "par"), 3)
+        self.assertEqual(len(parallel), 12)
+        self.assertEqual(parallel, sequential)
+        self.assertIn('<a href="/base/">home</a>', parallel[os.path.join("post3", "index.html")])
+
+    def test_error_names_failing_page(self):
+        bad_path = os.path.join(self.content, "post5", "index.md")
+        self.write(bad_path, "no title here")
+        with self.assertRaises(Exception) as context:
+            self.build(os.path.join(self.root, "par"), 2)
+        self.assertIn(bad_path, str(context.exception))
+        self.assertIn("There is no title found", str(context.exception))
@@ -0,0 +1,62 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.generate_page import generate_page_recursive
+from src.pipeline import generate_pages_pipelined
+from tempsite import TempSiteTestCase
+
+class TestPipeline(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/post0)")
+        for i in range(20):
+            self.write(os.path.join(self.content, f"post{i}", "index.md"), f"# Post {i}\n\n- item _{i}_")
+
+    def read_tree(self, dir_path):
+        outputs = {}
+        for parent, _, names in os.walk(dir_path):
+            for name in names:
+                with open(os.path.join(parent, name), 'r', encoding="utf-8") as file:
+                    outputs[os.path.relpath(os.path.join(parent, name), dir_path)] = file.read()
+        return outputs
+
+    def build(self, dest, **kwargs):
+        out = StringIO()
+        with redirect_stdout(out):
+            stages = generate_pages_pipelined(self.content, self.template, dest, "/base/", **kwargs)
+        return stages, out.getvalue()
+
+    def expected(self):
+        dest = os.path.join(self.root, "expected")
+        os.makedirs(dest)
+        with redirect_stdout(StringIO()):
+            generate_page_recursive(self.content, self.template, dest, "/base/")
+        return self.read_tree(dest)
+
+    def test_matches_recursive_build(self):
+        expected = self.expected()
+        for jobs, depth in [(1, 16), (1, 1), (3, 2)]:
+            dest = os.path.join(self.root, f"out-{jobs}-{depth}")
+            stages, output = self.build(dest, jobs=jobs, read_depth=depth, write_depth=depth)
+            self.assertEqual(self.read_tree(dest), expected)
+            self.assertIn("Pipeline: 21 pages in", output)
+            self.assertEqual([stage.name for stage in stages], ["discover", "read", "render", "write"])
+            self.assertEqual(stages[2].workers, jobs)
+            self.assertTrue(all(stage.busy > 0 for stage in stages))
+
+    def test_failure_names_page(self):
+        self.write(os.path.join(self.content, "post7", "index.md"), "no title here")
+        for jobs in [1, 2]:
+            with self.assertRaises(Exception) as context:
+                self.build(os.path.join(self.root, f"out-{jobs}"), jobs=jobs)
+            self.assertEqual(str(context.exception),
+                             f"failed to generate page {os.path.join(self.content, 'post7', 'index.md')}: "
+                             "There is no title found")
+
+if __name__ == "__main__":
+    unittest.main()
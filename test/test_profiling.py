@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from src import generate_page
+from src.generate_page import find_pages, write_page
+from src.parallel import generate_pages
+from src.pipeline import generate_pages_pipelined
+from src.profiling import Profiler, profiler
+from src.template import Template
+from tempsite import TempSiteTestCase
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_stages_are_exclusive(self):
+        p = Profiler()
+        p.start("outer")
+        time.sleep(0.01)
+        p.start("inner")
+        time.sleep(0.02)
+        p.stop()
+        p.stop()
+        outer, inner = p.stages["outer"][0], p.stages["inner"][0]
+        self.assertGreaterEqual(inner, 0.02)
+        self.assertLess(outer, 0.02)
+        self.assertEqual(p.stages["inner"][1], 1)
+
+    def test_timed_iter_counts_items_and_pages(self):
+        p = Profiler()
+        p.begin_page("a.md")
+        self.assertEqual(list(p.timed_iter("read", ["x", "y"])), ["x", "y"])
+        p.end_page()
+        self.assertEqual(p.stages["read"][1], 3)
+        self.assertIn("read", p.pages["a.md"])
+
+    def test_take_and_merge(self):
+        worker, parent = Profiler(), Profiler()
+        worker.begin_page("a.md")
+        worker.start("read")
+        worker.stop()
+        worker.end_page()
+        parent.add_stats(worker.take_stats())
+        self.assertEqual(worker.stages, {})
+        self.assertEqual(parent.stages["read"][1], 1)
+        self.assertIn("a.md", parent.summary())
+
+class TestProfiledPage(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        profiler.enabled = False
+        profiler.take_stats()
+
+    def test_profiled_write_page_output_and_json(self):
+        self.check_profiled_write_page(["read", "block_parse", "inline_parse", "serialize", "template", "write"])
+
+    def test_profiled_streamed_write_page(self):
+        with mock.patch.object(generate_page, "STREAM_THRESHOLD", 0):
+            self.check_profiled_write_page(["read", "title", "block_parse", "inline_parse", "serialize",
+                                            "template", "write"])
+
+    def check_profiled_write_page(self, stages):
+        from_path = os.path.join(self.root, "index.md")
+        with open(from_path, 'w', encoding="utf-8") as file:
+            file.write("# Title\n\nSome **text** and a [link](/x)\n\n- item\n")
+        template = Template('<title>{{ Title }}</title><a href="/">h</a>{{ Content }}', "/b/")
+        plain_path = os.path.join(self.root, "plain.html")
+        profiled_path = os.path.join(self.root, "profiled.html")
+        write_page(from_path, plain_path, template)
+        profiler.enable()
+        write_page(from_path, profiled_path, template)
+        with open(plain_path, encoding="utf-8") as plain, open(profiled_path, encoding="utf-8") as profiled:
+            self.assertEqual(plain.read(), profiled.read())
+        for stage in stages:
+            self.assertIn(stage, profiler.stages)
+        json_path = os.path.join(self.root, "profile.json")
+        profiler.write_json(json_path)
+        with open(json_path, encoding="utf-8") as file:
+            data = json.load(file)
+        self.assertIn(from_path, data["pages"])
+
+class TestProfiledBuild(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.template = self.path("template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            self.write(os.path.join(self.content, f"post{i}", "index.md"), f"# Post {i}\n\nSome **text**")
+        profiler.enable()
+        self.record_static()
+
+    def tearDown(self):
+        profiler.enabled = False
+        profiler.take_stats()
+
+    def record_static(self):
+        # recorded by the parent before any worker starts, as the static
+        # copy is
+        profiler.take_stats()
+        profiler.start("static")
+        profiler.stop()
+
+    def check_profile(self):
+        self.assertEqual(profiler.stages["static"][1], 1)
+        for stage in ["read", "block_parse", "template", "write"]:
+            self.assertIn(stage, profiler.stages)
+        self.assertEqual(sorted(profiler.pages),
+                         sorted(from_path for from_path, _ in find_pages(self.content, self.path("docs"))))
+
+    def test_jobs(self):
+        with redirect_stdout(StringIO()):
+            generate_pages(find_pages(self.content, self.path("docs")), self.template, "/", jobs=2)
+        self.check_profile()
+
+    def test_pipeline(self):
+        for jobs in [1, 2]:
+            with self.subTest(jobs=jobs):
+                self.record_static()
+                with redirect_stdout(StringIO()):
+                    generate_pages_pipelined(self.content, self.template, self.path("docs"), "/", jobs)
+                self.check_profile()
@@ -0,0 +1,40 @@
+import builtins
+import unittest
+from io import StringIO
+from unittest import mock
+
+from src.generate_page import render_page
+from src.render import render_markdown, write_markdown
+from src.template import Template
+
+MARKDOWN = "# Title\n\nA [link](/blog) and ![img](/images/x.png)\n\n- one\n- _two_"
+
+class TestRenderMarkdown(unittest.TestCase):
+    def setUp(self):
+        self.template = Template('<title>{{ Title }}</title><link href="/index.css">{{ Content }}', "/site/")
+
+    def test_matches_render_page(self):
+        self.assertEqual(render_markdown(MARKDOWN, self.template), render_page(MARKDOWN, self.template))
+
+    def test_content_only_without_template(self):
+        self.assertEqual(render_markdown("[a](/x)"), '<div><p><a href="/x">a</a></p></div>')
+        self.assertEqual(render_markdown("[a](/x)", basepath="/site/"), '<div><p><a href="/site/x">a</a></p></div>')
+
+    def test_write_streams_same_html(self):
+        for template in [self.template, None]:
+            out = StringIO()
+            write_markdown(out, StringIO(MARKDOWN), template, "/site/")
+            self.assertEqual(out.getvalue(), render_markdown(MARKDOWN, template, "/site/"))
+
+    def test_no_filesystem_access(self):
+        with mock.patch.object(builtins, "open", side_effect=AssertionError("opened a file")):
+            render_markdown(MARKDOWN, self.template)
+            write_markdown(StringIO(), iter(MARKDOWN.split("\n")), self.template)
+
+    def test_missing_title_with_template(self):
+        with self.assertRaises(Exception) as context:
+            render_markdown("no heading", self.template)
+        self.assertEqual(str(context.exception), "There is no title found")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.block_cache import block_cache
+from src.generate_page import find_pages, render_page
+from src.incremental import generate_pages_incremental
+from src.inline_cache import inline_cache
+from src.parallel import generate_pages
+from src.search import SearchIndex, search_index, shard_name, terms
+from src.template import Template
+from tempsite import TempSiteTestCase
+
+MD = ("# Searching Middle-earth\n\n[< Back Home](/)\n\nThe **Ring** of _power_ ![an eye](/eye.png)\n\n"
+      "- Frodo\n- Sam\n\n> Not all who wander\n\n```\nring.destroy()\n```")
+
+class TestSearchTerms(unittest.TestCase):
+    def test_terms(self):
+        self.assertEqual(terms("The Ring-bearer, a hobbit"), ["the", "ring", "bearer", "hobbit"])
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("ring"), "ri")
+        self.assertEqual(shard_name("a1"), "a1")
+        self.assertEqual(shard_name("éowyn"), "_c3a96f")
+
+class TestSearchCollection(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = Template("{{ Title }}|{{ Content }}", "/")
+        search_index.enable(True)
+
+    def tearDown(self):
+        search_index.enable(False)
+        search_index.take_stats()
+        inline_cache.enable(0)
+        inline_cache.take_stats()
+        block_cache.enable(None)
+        block_cache.take_stats()
+
+    def collect(self):
+        render_page(MD, self.template, "index.html")
+        return search_index.take_stats()["index.html"]
+
+    def test_text_of_every_block(self):
+        page = self.collect()
+        self.assertEqual(page["title"], "Searching Middle-earth")
+        self.assertEqual(page["terms"], {
+            "searching": 1, "middle": 1, "earth": 1, "back": 1, "home": 1, "the": 1, "ring": 2, "of": 1,
+            "power": 1, "frodo": 1, "sam": 1, "not": 1, "all": 1, "who": 1, "wander": 1, "destroy": 1,
+        })
+
+    def test_cache_hits_index_the_same_text(self):
+        expected = self.collect()
+        inline_cache.enable(16)
+        block_cache.enable(self.root)
+        for _ in range(2):
+            self.assertEqual(self.collect(), expected)
+        block_cache.enable(None)
+        self.assertEqual(self.collect(), expected)
+        self.assertGreater(inline_cache.hits, 0)
+        self.assertGreater(block_cache.hits, 0)
+
+class TestSearchWrite(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.root, "docs")
+        self.cache_path = os.path.join(self.root, ".cache", "search.json")
+        self.index = SearchIndex()
+
+    def add(self, rel_path, title, text):
+        self.index.record(text)
+        self.index.add_page(os.path.join(self.public, rel_path), title)
+
+    def write_index(self, rel_paths):
+        with redirect_stdout(StringIO()):
+            return self.index.write(self.public, "/site/", self.cache_path,
+                                    [os.path.join(self.public, rel_path) for rel_path in rel_paths])
+
+    def read_shard(self, name):
+        with open(os.path.join(self.public, "search", name), 'r', encoding="utf-8") as file:
+            return json.load(file)
+
+    def test_shards_and_page_table(self):
+        self.add("index.html", "Home", "Ring ring hobbit")
+        self.add("blog/post/index.html", "Post", "ring wraith")
+        self.write_index(["index.html", "blog/post/index.html"])
+        self.assertEqual(self.read_shard("pages.json"), {
+            "pages": {"0": ["/site/blog/post/", "Post"], "1": ["/site/", "Home"]},
+            "shard_prefix_length": 2,
+        })
+        self.assertEqual(self.read_shard("ri.json"), {"ring": [[0, 1], [1, 2]]})
+        self.assertEqual(self.read_shard("wr.json"), {"wraith": [[0, 1]]})
+        self.assertEqual(sorted(os.listdir(os.path.join(self.public, "search"))),
+                         ["ho.json", "pages.json", "ri.json", "wr.json"])
+
+    def test_changed_page_rewrites_only_its_shards(self):
+        self.add("index.html", "Home", "ring hobbit")
+        self.add("post.html", "Post", "ring wraith")
+        self.write_index(["index.html", "post.html"])
+        self.add("post.html", "Post", "ring balrog")
+        self.assertEqual(self.write_index(["index.html", "post.html"]), (1, 1))
+        self.assertEqual(self.read_shard("ri.json"), {"ring": [[0, 1], [1, 1]]})
+        self.assertEqual(self.read_shard("ba.json"), {"balrog": [[1, 1]]})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "wr.json")))
+
+    def test_removed_page_leaves_the_index(self):
+        self.add("index.html", "Home", "ring hobbit")
+        self.add("post.html", "Post", "ring wraith")
+        self.write_index(["index.html", "post.html"])
+        self.write_index(["post.html"])
+        self.assertEqual(self.read_shard("pages.json")["pages"], {"1": ["/site/post.html", "Post"]})
+        self.assertEqual(self.read_shard("ri.json"), {"ring": [[1, 1]]})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "ho.json")))
+
+    def test_files_from_a_forgotten_index_are_removed(self):
+        self.add("index.html", "Home", "zebraword hobbit")
+        self.write_index(["index.html"])
+        os.remove(self.cache_path)
+        self.add("index.html", "Home", "hobbit")
+        self.assertEqual(self.write_index(["index.html"]), (0, 1))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.public, "search"))), ["ho.json", "pages.json"])
+
+class TestSearchBuild(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.cache_path = os.path.join(self.root, ".cache", "search.json")
+        self.manifest = os.path.join(self.root, ".cache", "manifest.json")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            self.write(os.path.join(self.content, f"post{i}", "index.md"), f"# Post {i}\n\nword{i} shared")
+        search_index.enable(True)
+
+    def tearDown(self):
+        search_index.enable(False)
+        search_index.take_stats()
+
+    def build_incremental(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            generate_pages_incremental(self.content, self.template, self.docs, "/", self.manifest,
+                                       static_dir=self.root, explain=True, search_cache_path=self.cache_path)
+            search_index.write(self.docs, "/", self.cache_path,
+                               [dest_path for _, dest_path in find_pages(self.content, self.docs)])
+        return out.getvalue()
+
+    def test_workers_send_pages_back(self):
+        with redirect_stdout(StringIO()):
+            generate_pages(find_pages(self.content, self.docs), self.template, "/", jobs=3)
+        pages = search_index.take_stats()
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(pages[os.path.join(self.docs, "post4", "index.html")]["terms"],
+                         {"post": 1, "word4": 1, "shared": 1})
+
+    def test_incremental_build_indexes_only_changed_pages(self):
+        self.build_incremental()
+        self.write(os.path.join(self.content, "post2", "index.md"), "# Post 2\n\nrewritten")
+        output = self.build_incremental()
+        self.assertIn("Rebuilt 1 of 6 pages", output)
+        with open(os.path.join(self.docs, "search", "sh.json"), 'r', encoding="utf-8") as file:
+            self.assertEqual([page_id for page_id, _ in json.load(file)["shared"]], [0, 1, 3, 4, 5])
+
+    def test_pages_missing_from_the_index_are_rendered(self):
+        self.build_incremental()
+        os.remove(self.cache_path)
+        output = self.build_incremental()
+        self.assertIn("Rebuilt 6 of 6 pages", output)
+        self.assertIn("not in search index", output)
+
+if __name__ == "__main__":
+    unittest.main()
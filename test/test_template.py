@@ -0,0 +1,68 @@
+import unittest
+from io import StringIO
+from src.template import LinkRewriter, Template, rewrite_links
+
+def render_by_replace(text, title, content, basepath):
+    html = text.replace("{{ Title }}", title)
+    html = html.replace("{{ Content }}", content)
+    html = html.replace('src="/', f'src="{basepath}')
+    return html.replace('href="/', f'href="{basepath}')
+
+class TestTemplate(unittest.TestCase):
+    def assertRendersLikeReplace(self, text, title, content, basepath="/base/"):
+        template = Template(text, basepath)
+        self.assertEqual(template.render(title, content), render_by_replace(text, title, content, basepath))
+
+    def test_segments_and_slots(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>", "/")
+        self.assertEqual(template.segments, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(template.slots, ["{{ Title }}", "{{ Content }}"])
+        self.assertTrue(template.exact)
+
+    def test_template_links_rewritten_once(self):
+        template = Template('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/site/")
+        self.assertEqual(template.segments[0], '<link href="/site/index.css" /><img src="/site/a.png" />')
+
+    def test_render(self):
+        self.assertRendersLikeReplace(
+            '<title>{{ Title }}</title><link href="/index.css" /><article>{{ Content }}</article>',
+            "Home",
+            '<div><p><a href="/blog">blog</a><img src="/x.png" alt="x" /></p></div>',
+        )
+
+    def test_repeated_slots(self):
+        self.assertRendersLikeReplace("{{ Title }}|{{ Content }}|{{ Title }}|{{ Content }}", "T", "<p>c</p>")
+
+    def test_no_slots(self):
+        self.assertRendersLikeReplace('<a href="/">x</a>', "T", "C")
+
+    def test_title_containing_content_slot(self):
+        self.assertRendersLikeReplace("<title>{{ Title }}</title>{{ Content }}", "a {{ Content }} b", "<p>c</p>")
+
+    def test_link_split_across_slot(self):
+        template = Template('<a href="{{ Title }}">x</a>', "/base/")
+        self.assertFalse(template.exact)
+        self.assertRendersLikeReplace('<a href="{{ Title }}">x</a>', "/blog", "C")
+
+    def test_slot_name_split_across_title(self):
+        self.assertRendersLikeReplace("{{ Con{{ Title }}tent }}", "", "<p>c</p>")
+
+    def test_write_streams_fragments(self):
+        text = '<title>{{ Title }}</title><link href="/index.css" /><article>{{ Content }}</article>'
+        content = '<div><p>x href="/a" src="/b"</p><a href="/c">c</a></div>'
+        template = Template(text, "/base/")
+        out = StringIO()
+        template.write(out, "T", [content[:9], content[9:17], content[17:]])
+        self.assertEqual(out.getvalue(), render_by_replace(text, "T", content, "/base/"))
+
+class TestLinkRewriter(unittest.TestCase):
+    def test_every_split_point(self):
+        text = 'a src="/x" b href="/y" c src=" d href="/'
+        for i in range(len(text) + 1):
+            for j in range(i, len(text) + 1):
+                out = StringIO()
+                rewriter = LinkRewriter(out, "/base/")
+                rewriter.writelines([text[:i], text[i:j], text[j:]])
+                rewriter.flush()
+                self.assertEqual(out.getvalue(), rewrite_links(text, "/base/"))
+
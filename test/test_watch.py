@@ -0,0 +1,82 @@
+import os
+import shutil
+import threading
+import urllib.request
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.watch import LiveReload, RELOAD_SCRIPT, SiteWatcher, make_server
+from tempsite import TempSiteTestCase
+
+class TestSiteWatcher(TempSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.path("template.html"), "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write(self.path("static", "index.css"), "body {}")
+        self.write(self.path("content", "index.md"), "# Home")
+        self.write(self.path("content", "post", "index.md"), "# Post")
+        self.write(self.path(".cache", "manifest.json"), "{}")
+        self.watcher = SiteWatcher(self.path("content"), self.path("static"), self.path("template.html"),
+                                   self.path("docs"), "/", self.path(".cache", "static.json"),
+                                   self.path(".cache", "manifest.json"))
+        with redirect_stdout(StringIO()):
+            self.watcher.build()
+
+    def poll(self):
+        with redirect_stdout(StringIO()):
+            return self.watcher.poll()
+
+    def test_initial_build(self):
+        self.assertEqual(self.read("docs", "post", "index.html"), "<title>Post</title><body><div><h1>Post</h1></div></body>")
+        self.assertEqual(self.read("docs", "index.css"), "body {}")
+        self.assertFalse(os.path.exists(self.path(".cache", "manifest.json")))
+        self.assertIsNone(self.poll())
+
+    def test_only_edited_page_is_rendered(self):
+        self.write(self.path("content", "post", "index.md"), "# Edited post", mtime_ns=10**9)
+        self.assertEqual(self.poll(), self.path("content", "post", "index.md"))
+        self.assertIn("<h1>Edited post</h1>", self.read("docs", "post", "index.html"))
+
+    def test_template_change_renders_all(self):
+        self.write(self.path("template.html"), "<h6>{{ Title }}</h6>{{ Content }}", mtime_ns=10**9)
+        changed = self.poll()
+        self.assertTrue(changed.startswith("template"))
+        self.assertTrue(self.read("docs", "index.html").startswith("<h6>Home</h6>"))
+
+    def test_failed_page_does_not_stop_the_others(self):
+        self.write(self.path("template.html"), "<h6>{{ Title }}</h6>{{ Content }}", mtime_ns=10**9)
+        self.write(self.path("content", "a", "index.md"), "no title")
+        with self.assertRaises(Exception):
+            self.poll()
+        # pages after the broken one still get the new template
+        self.assertTrue(self.read("docs", "post", "index.html").startswith("<h6>Post</h6>"))
+        self.assertEqual(self.watcher.pending, {self.path("content", "a", "index.md")})
+        # and the broken page is rendered once it is fixed
+        self.write(self.path("content", "a", "index.md"), "# A", mtime_ns=10**9)
+        self.assertIn("a", self.poll())
+        self.assertTrue(self.read("docs", "a", "index.html").startswith("<h6>A</h6>"))
+        self.assertEqual(self.watcher.pending, set())
+
+    def test_removed_page_and_new_asset(self):
+        shutil.rmtree(self.path("content", "post"))
+        self.write(self.path("static", "app.js"), "x")
+        self.assertIn("removed", self.poll())
+        self.assertFalse(os.path.exists(self.path("docs", "post")))
+        self.assertEqual(self.read("docs", "app.js"), "x")
+
+class TestDevServer(TempSiteTestCase):
+    def test_injects_reload_script(self):
+        self.write(self.path("index.html"), "<html><body>hi</body></html>")
+        server = make_server(self.root, LiveReload(), "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+        self.assertEqual(body, "<html><body>hi" + RELOAD_SCRIPT + "</body></html>")
+
+    def test_reload_wait(self):
+        reload = LiveReload()
+        threading.Timer(0.01, reload.notify).start()
+        self.assertEqual(reload.wait(0, timeout=2), 1)